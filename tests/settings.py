@@ -0,0 +1,23 @@
+"""
+Minimal settings for running the wall_e_models tests against SQLite
+
+python -m django test tests --settings=tests.settings
+"""
+
+SECRET_KEY = 'wall_e_models-tests'
+
+INSTALLED_APPS = [
+    'wall_e_models',
+]
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+TIME_ZONE = 'Canada/Pacific'
+USE_TZ = True
+
+DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
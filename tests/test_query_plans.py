@@ -0,0 +1,119 @@
+import datetime
+
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from wall_e_models.customFields import pstdatetime
+from wall_e_models.models import BanRecord, CommandStat, Reminder, UserPoint
+
+
+class HotPathQueryPlanTests(TestCase):
+    """
+    Runs EXPLAIN QUERY PLAN on the queries that the hot paths send to SQLite and fails if any of them has to scan a
+    whole table instead of searching or scanning one of its indexes
+    """
+
+    def assert_no_full_table_scans(self, run_queries, allow_index_scans=True):
+        """
+        Keyword Arguments
+        run_queries -- function that sends the queries to check
+        allow_index_scans -- whether reading a whole index in order, such as for an ORDER BY, is acceptable. Searches
+         that should only touch the matching rows disable this. Subqueries, such as the count of all the active bans,
+         can always scan an index.
+        """
+        with CaptureQueriesContext(connection) as captured_queries:
+            run_queries()
+        queries = [
+            query['sql'] for query in captured_queries.captured_queries
+            if query['sql'].lstrip().upper().startswith('SELECT')
+        ]
+        self.assertGreater(len(queries), 0)
+        for query in queries:
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {query}")
+                query_plan = cursor.fetchall()
+            parent_step_ids = {step_id: parent_step_id for step_id, parent_step_id, _, _ in query_plan}
+            subquery_step_ids = {step_id for step_id, _, _, step in query_plan if 'SUBQUERY' in step}
+
+            def in_subquery(step_id):
+                while step_id in parent_step_ids:
+                    step_id = parent_step_ids[step_id]
+                    if step_id in subquery_step_ids:
+                        return True
+                return False
+            table_scans = [
+                step for step_id, _, _, step in query_plan
+                if step.startswith('SCAN ') and (
+                    ' USING ' not in step or not (allow_index_scans or in_subquery(step_id))
+                )
+            ]
+            query_plan = [step for _, _, _, step in query_plan]
+            self.assertEqual(table_scans, [], f"full table scan in the plan {query_plan} for {query}")
+
+    def test_user_point_rank(self):
+        user_point = UserPoint(id=1, user_id=1, points=500)
+        self.assert_no_full_table_scans(lambda: async_to_sync(user_point.get_rank)())
+
+    def test_user_point_ranks(self):
+        self.assert_no_full_table_scans(lambda: async_to_sync(UserPoint.get_ranks)([1, 2, 3]))
+
+    def test_user_point_load_to_cache(self):
+        self.assert_no_full_table_scans(lambda: async_to_sync(UserPoint.load_to_cache)())
+
+    def test_user_point_bucket(self):
+        self.assert_no_full_table_scans(lambda: async_to_sync(UserPoint.get_users_with_current_bucket_number)(1))
+
+    def test_user_point_expired_images(self):
+        self.assert_no_full_table_scans(lambda: async_to_sync(UserPoint.get_users_with_expired_images)())
+
+    def test_reminders_by_author(self):
+        self.assert_no_full_table_scans(lambda: async_to_sync(Reminder.get_reminder_by_author)(1))
+
+    def test_expired_reminders(self):
+        self.assert_no_full_table_scans(lambda: async_to_sync(Reminder.get_expired_reminders)())
+        self.assert_no_full_table_scans(lambda: async_to_sync(Reminder.claim_expired_reminders)())
+
+    def test_command_stats_date_range(self):
+        end_date = pstdatetime.now()
+        self.assert_no_full_table_scans(lambda: async_to_sync(CommandStat.get_command_stats_dict)(
+            ['command', 'invoked_subcommand'], start_date=end_date - datetime.timedelta(days=7), end_date=end_date
+        ))
+
+    def test_active_ban_by_user_id(self):
+        self.assert_no_full_table_scans(lambda: async_to_sync(BanRecord.unban_by_id)(1))
+        self.assert_no_full_table_scans(lambda: async_to_sync(BanRecord.bulk_unban)([1, 2, 3]))
+
+    def test_inactive_bans_by_user_id(self):
+        self.assert_no_full_table_scans(
+            lambda: list(BanRecord.objects.filter(user_id=1, unban_date__isnull=False))
+        )
+
+    def test_active_ban_search(self):
+        self.assert_no_full_table_scans(
+            lambda: async_to_sync(BanRecord.search_active_bans)('bob'), allow_index_scans=False
+        )
+        self.assert_no_full_table_scans(
+            lambda: async_to_sync(BanRecord.search_active_bans)('1234'), allow_index_scans=False
+        )
+        self.assert_no_full_table_scans(
+            lambda: async_to_sync(BanRecord.get_all_active_bans)('bob', match_substrings=False), allow_index_scans=False
+        )
+
+    def test_active_bans_cursor_page(self):
+        ban_date = pstdatetime.now()
+        # bans on both sides of the cursors so that the count comes back with the page instead of on its own
+        BanRecord.objects.bulk_create([
+            BanRecord(username='bob', user_id=1, reason='raid', ban_date=ban_date - datetime.timedelta(days=1)),
+            BanRecord(username='alice', user_id=2, reason='raid', ban_date=None)
+        ])
+        self.assert_no_full_table_scans(
+            lambda: async_to_sync(BanRecord.get_active_bans_page)(
+                cursor=BanRecord._encode_page_cursor(ban_date, 100)
+            ), allow_index_scans=False
+        )
+        self.assert_no_full_table_scans(
+            lambda: async_to_sync(BanRecord.get_active_bans_page)(cursor=BanRecord._encode_page_cursor(None, 100)),
+            allow_index_scans=False
+        )
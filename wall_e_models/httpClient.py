@@ -0,0 +1,116 @@
+import asyncio
+
+import aiohttp
+
+
+class AiohttpTransport:
+    """
+    Sends the requests for an AvatarHttpClient over a single aiohttp.ClientSession so that the connections to
+    discord's CDN are pooled and reused
+
+    The session is only created on the first request as it needs to be created from within the running event loop
+    and is created again if the requests start coming from a different event loop
+    """
+
+    def __init__(self, max_connections=20):
+        self.max_connections = max_connections
+        self._session = None
+        self._session_loop = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        running_loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not running_loop:
+            # a session from a different event loop can not be used or closed from this one so it is just dropped
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections)
+            )
+            self._session_loop = running_loop
+        return self._session
+
+    async def get(self, url, timeout, read_body):
+        """
+        Sends a GET request to the given url, or a HEAD request if the body is not needed, as aiohttp closes the
+        connection of a response whose body is left unread instead of returning it to the pool
+
+        Keyword Arguments
+        url -- the url to send the request to
+        timeout -- the number of seconds to wait for the whole request before raising asyncio.TimeoutError
+        read_body -- whether the body of the response needs to be read
+
+        Return
+        int -- the status code of the response
+        bytes -- the body of the response or None if read_body is False
+        """
+        session = self._get_session()
+        send_request = session.get if read_body else session.head
+        async with send_request(url, timeout=aiohttp.ClientTimeout(total=timeout), allow_redirects=True) as response:
+            return response.status, (await response.read() if read_body else None)
+
+    async def close(self):
+        if self._session is not None:
+            if self._session_loop is asyncio.get_running_loop():
+                await self._session.close()
+            self._session = None
+            self._session_loop = None
+
+
+class AvatarHttpClient:
+    """
+    Non-blocking HTTP client used for downloading avatars and validating the CDN links in the avatar channel
+
+    AvatarHttpClient.shared() returns the client that the models use, which can be replaced with
+    AvatarHttpClient.set_shared(), for example with a client that uses a transport that talks to a local stub
+    server. A transport just needs the same get() and close() coroutines as AiohttpTransport.
+
+    The shared client keeps its connections open between requests, so AvatarHttpClient.close_shared() needs to be
+    awaited when the bot shuts down.
+    """
+    _shared = None
+
+    def __init__(self, timeout=10, max_concurrent_requests=10, transport=None):
+        self.timeout = timeout
+        self.max_concurrent_requests = max_concurrent_requests
+        self.transport = (
+            AiohttpTransport(max_connections=max_concurrent_requests) if transport is None else transport
+        )
+        self._semaphore = None
+        self._semaphore_loop = None
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None:
+            cls._shared = AvatarHttpClient()
+        return cls._shared
+
+    @classmethod
+    def set_shared(cls, client):
+        cls._shared = client
+
+    @classmethod
+    async def close_shared(cls):
+        """Closes the connections of the shared client, a new one is created the next time shared() is called"""
+        shared_client, cls._shared = cls._shared, None
+        if shared_client is not None:
+            await shared_client.close()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        running_loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not running_loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+            self._semaphore_loop = running_loop
+        return self._semaphore
+
+    async def get_status(self, url) -> int:
+        """Returns the status code for the given url from a HEAD request, so the body is never downloaded"""
+        async with self._get_semaphore():
+            status, _ = await self.transport.get(url, self.timeout, read_body=False)
+        return status
+
+    async def get_content(self, url) -> bytes:
+        """Returns the body of a GET request to the given url"""
+        async with self._get_semaphore():
+            _, content = await self.transport.get(url, self.timeout, read_body=True)
+        return content
+
+    async def close(self):
+        await self.transport.close()
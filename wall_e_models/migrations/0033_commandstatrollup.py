@@ -0,0 +1,49 @@
+# Generated by Django 4.2.22 on 2026-10-17 03:38
+
+from django.db import migrations, models
+from django.db.models import Count
+
+ROLLUP_FIELDS = ['year', 'month', 'day', 'hour', 'channel_name', 'command', 'invoked_with']
+
+
+def backfill_command_stat_rollups(apps, schema_editor):
+    CommandStat = apps.get_model('wall_e_models', 'CommandStat')
+    CommandStatRollup = apps.get_model('wall_e_models', 'CommandStatRollup')
+    CommandStatRollup.objects.bulk_create(
+        [
+            CommandStatRollup(**rollup)
+            for rollup in CommandStat.objects.values(*ROLLUP_FIELDS).annotate(
+                number_of_commands=Count('epoch_time')
+            ).order_by().iterator()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wall_e_models', '0032_reactrole'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommandStatRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('month', models.IntegerField()),
+                ('day', models.IntegerField()),
+                ('hour', models.IntegerField()),
+                ('channel_name', models.CharField(default='NA', max_length=2000)),
+                ('command', models.CharField(max_length=2000)),
+                ('invoked_with', models.CharField(max_length=2000)),
+                ('number_of_commands', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='commandstatrollup',
+            constraint=models.UniqueConstraint(fields=('year', 'month', 'day', 'hour', 'channel_name', 'command', 'invoked_with'), name='unique_command_stat_rollup'),
+        ),
+        migrations.RunPython(backfill_command_stat_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.22 on 2026-10-17 03:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wall_e_models', '0033_commandstatrollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='helpmessage',
+            name='help_message_expiration_date',
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+    ]
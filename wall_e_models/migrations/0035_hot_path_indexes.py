@@ -0,0 +1,41 @@
+# Generated by Django 4.2.22 on 2026-10-17 03:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wall_e_models', '0034_helpmessage_expiration_date_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='banrecord',
+            index=models.Index(condition=models.Q(('unban_date__isnull', False)), fields=['user_id'], name='ban_record_inactive_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commandstat',
+            index=models.Index(fields=['year', 'month', 'day', 'hour'], name='command_stat_hour_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['reminder_date_epoch'], name='reminder_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['author_id', 'reminder_date_epoch'], name='reminder_author_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userpoint',
+            index=models.Index(fields=['points', 'id'], name='user_point_points_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userpoint',
+            index=models.Index(fields=['bucket_number', 'points'], name='user_point_bucket_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userpoint',
+            index=models.Index(condition=models.Q(('discord_avatar_link_expiry_date__isnull', False), ('outsized_profile_pic', False)), fields=['discord_avatar_link_expiry_date'], name='user_point_avatar_expiry_idx'),
+        ),
+    ]
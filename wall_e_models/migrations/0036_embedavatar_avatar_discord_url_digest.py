@@ -0,0 +1,33 @@
+# Generated by Django 4.2.22 on 2026-10-17 03:44
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_avatar_discord_url_digests(apps, schema_editor):
+    EmbedAvatar = apps.get_model('wall_e_models', 'EmbedAvatar')
+    avatars = []
+    for avatar in EmbedAvatar.objects.only('id', 'avatar_discord_url').iterator(chunk_size=1000):
+        avatar.avatar_discord_url_digest = hashlib.sha256(avatar.avatar_discord_url.encode('utf-8')).hexdigest()
+        avatars.append(avatar)
+        if len(avatars) == 1000:
+            EmbedAvatar.objects.bulk_update(avatars, ['avatar_discord_url_digest'])
+            avatars = []
+    EmbedAvatar.objects.bulk_update(avatars, ['avatar_discord_url_digest'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wall_e_models', '0035_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='embedavatar',
+            name='avatar_discord_url_digest',
+            field=models.CharField(db_index=True, default=None, max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_avatar_discord_url_digests, migrations.RunPython.noop),
+    ]
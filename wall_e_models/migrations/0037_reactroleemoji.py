@@ -0,0 +1,46 @@
+# Generated by Django 4.2.22 on 2026-10-17 03:45
+
+import json
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def convert_emoji_roles_json(apps, schema_editor):
+    ReactRole = apps.get_model('wall_e_models', 'ReactRole')
+    ReactRoleEmoji = apps.get_model('wall_e_models', 'ReactRoleEmoji')
+    ReactRoleEmoji.objects.bulk_create(
+        [
+            ReactRoleEmoji(react_role_id=message_id, emoji=emoji, role_id=int(role_id))
+            for message_id, emoji_roles_json in ReactRole.objects.values_list('message_id', 'emoji_roles_json')
+            for emoji, role_id in json.loads(emoji_roles_json).items()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wall_e_models', '0036_embedavatar_avatar_discord_url_digest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReactRoleEmoji',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('emoji', models.CharField(max_length=200)),
+                ('role_id', models.BigIntegerField(db_index=True)),
+                ('react_role', models.ForeignKey(db_column='message_id', on_delete=django.db.models.deletion.CASCADE, related_name='emoji_roles', to='wall_e_models.reactrole', to_field='message_id')),
+            ],
+            options={
+                'db_table': 'wall_e_models_react_role_emojis',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='reactroleemoji',
+            constraint=models.UniqueConstraint(fields=('react_role', 'emoji'), name='unique_react_role_emoji'),
+        ),
+        migrations.RunPython(convert_emoji_roles_json, migrations.RunPython.noop),
+    ]
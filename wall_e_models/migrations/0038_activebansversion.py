@@ -0,0 +1,20 @@
+# Generated by Django 4.2.22 on 2026-10-17 03:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wall_e_models', '0037_reactroleemoji'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActiveBansVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.22 on 2026-10-17 03:46
+
+from django.db import migrations, models
+
+
+def backfill_search_fields(apps, schema_editor):
+    # lower-casing in python like BanRecord.set_search_fields does, as sqlite's LOWER() only handles ASCII
+    BanRecord = apps.get_model('wall_e_models', 'BanRecord')
+    bans = []
+    for ban in BanRecord.objects.only('id', 'username', 'user_id').iterator(chunk_size=1000):
+        ban.normalized_username = ban.username.lower()
+        ban.user_id_text = f"{ban.user_id}"
+        bans.append(ban)
+        if len(bans) == 1000:
+            BanRecord.objects.bulk_update(bans, ['normalized_username', 'user_id_text'])
+            bans = []
+    BanRecord.objects.bulk_update(bans, ['normalized_username', 'user_id_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wall_e_models', '0038_activebansversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='banrecord',
+            name='normalized_username',
+            field=models.CharField(db_index=True, default=None, max_length=37, null=True),
+        ),
+        migrations.AddField(
+            model_name='banrecord',
+            name='user_id_text',
+            field=models.CharField(db_index=True, default=None, max_length=20, null=True),
+        ),
+        migrations.RunPython(backfill_search_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.22 on 2026-10-17 03:47
+
+from django.db import migrations
+
+
+def create_active_ban_date_index(apps, schema_editor):
+    # postgres sorts NULLs first in a descending index unless told otherwise while sqlite always sorts them last in
+    # descending order and does not support NULLS LAST in an index, so both wind up matching
+    # ORDER BY ban_date DESC NULLS LAST, id DESC
+    nulls_last = " NULLS LAST" if schema_editor.connection.vendor == 'postgresql' else ""
+    schema_editor.execute(
+        "CREATE INDEX ban_record_active_ban_date_idx ON wall_e_models_ban_records "
+        f"(ban_date DESC{nulls_last}, id DESC) WHERE unban_date IS NULL"
+    )
+
+
+def drop_active_ban_date_index(apps, schema_editor):
+    schema_editor.execute("DROP INDEX ban_record_active_ban_date_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wall_e_models', '0039_banrecord_search_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_active_ban_date_index, drop_active_ban_date_index),
+    ]
@@ -3,12 +3,23 @@
 from __future__ import annotations
 
 import asyncio
+import base64
+import bisect
+import collections
+import csv
 import datetime
+import hashlib
+import heapq
+import io
+import itertools
+import json
 import math
-import os
 import random
 import re
+import sys
+import threading
 import time
+import urllib.parse
 from typing import List
 
 import discord
@@ -17,8 +28,10 @@ from asgiref.sync import sync_to_async
 from dateutil.tz import tz
 from discord import HTTPException
 from django.conf import settings
-from django.db import models
-from django.db.models import Q, UniqueConstraint, F
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Q, UniqueConstraint, F, Case, When, Value, Count, Func, Max, Min, Sum, OuterRef, Subquery
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.forms import model_to_dict
 from django.utils import timezone
 
@@ -26,7 +39,7 @@ TIME_ZONE = 'Canada/Pacific'
 PACIFIC_TZ = tz.gettz(TIME_ZONE)
 
 from .customFields import pstdatetime, PSTDateTimeField  # noqa: E402
-import requests  # noqa: E402
+from .httpClient import AvatarHttpClient  # noqa: E402
 
 
 class ReactRole(models.Model):
@@ -42,13 +55,103 @@ class ReactRole(models.Model):
     @sync_to_async
     def insert_react_role(cls, react_role: ReactRole) -> None:
         """Adds entry to ReactRole table"""
-        react_role.save()
+        with transaction.atomic():
+            react_role.save()
+            ReactRole._replace_emoji_role_rows({react_role.message_id: json.loads(react_role.emoji_roles_json)})
 
     @classmethod
     @sync_to_async
     def update_react_role(cls, react_role: ReactRole) -> None:
         """Updates ReactRole entry"""
-        react_role.save()
+        with transaction.atomic():
+            react_role.save()
+            ReactRole._replace_emoji_role_rows({react_role.message_id: json.loads(react_role.emoji_roles_json)})
+
+    @classmethod
+    @sync_to_async
+    def set_emoji_roles(cls, message_id, emoji_roles: dict) -> None:
+        """Replaces the emoji => role_id mappings of the ReactRole with the given message_id"""
+        cls._save_emoji_roles({message_id: emoji_roles})
+
+    @classmethod
+    @sync_to_async
+    def replace_emoji_roles(cls, emoji_roles_by_message_id: dict) -> None:
+        """Replaces the emoji => role_id mappings of each of the ReactRoles keyed by message_id"""
+        cls._save_emoji_roles(emoji_roles_by_message_id)
+
+    @classmethod
+    def _save_emoji_roles(cls, emoji_roles_by_message_id: dict) -> None:
+        with transaction.atomic():
+            for react_role in ReactRole.objects.select_for_update().filter(
+                    message_id__in=list(emoji_roles_by_message_id.keys())):
+                react_role.emoji_roles_json = json.dumps(ReactRole._format_role_ids_like(
+                    emoji_roles_by_message_id[react_role.message_id], react_role.emoji_roles_json
+                ))
+                react_role.save(update_fields=['emoji_roles_json'])
+            ReactRole._replace_emoji_role_rows(emoji_roles_by_message_id)
+
+    @staticmethod
+    def _format_role_ids_like(emoji_roles: dict, emoji_roles_json) -> dict:
+        """
+        Converts the role_ids to the type that the role_ids in the existing emoji_roles_json are stored as, so that
+        the readers of emoji_roles_json keep getting the same format. The role_ids are left as they are if the
+        existing emoji_roles_json does not have any role_ids to go by.
+        """
+        try:
+            existing_role_ids = list(json.loads(emoji_roles_json).values())
+        except (TypeError, ValueError, AttributeError):
+            return emoji_roles
+        if len(existing_role_ids) == 0:
+            return emoji_roles
+        role_id_type = str if isinstance(existing_role_ids[0], str) else int
+        return {emoji: role_id_type(role_id) for emoji, role_id in emoji_roles.items()}
+
+    @classmethod
+    def _replace_emoji_role_rows(cls, emoji_roles_by_message_id: dict) -> None:
+        ReactRoleEmoji.objects.filter(react_role_id__in=list(emoji_roles_by_message_id.keys())).delete()
+        ReactRoleEmoji.objects.bulk_create([
+            ReactRoleEmoji(react_role_id=message_id, emoji=emoji, role_id=int(role_id))
+            for message_id, emoji_roles in emoji_roles_by_message_id.items()
+            for emoji, role_id in emoji_roles.items()
+        ])
+
+        def update_react_role_registry():
+            react_role_registry = ReactRoleRegistry.active()
+            if react_role_registry is not None:
+                for message_id, emoji_roles in emoji_roles_by_message_id.items():
+                    react_role_registry.set_emoji_roles(message_id, emoji_roles)
+        # only updating the registry once the new mappings are committed so that a rollback leaves it untouched
+        transaction.on_commit(update_react_role_registry)
+
+    @classmethod
+    @sync_to_async
+    def get_role_id_by_message_id_and_emoji(cls, message_id, emoji) -> int | None:
+        return ReactRoleEmoji.objects.filter(react_role_id=message_id, emoji=emoji).values_list(
+            'role_id', flat=True
+        ).first()
+
+    @classmethod
+    @sync_to_async
+    def get_message_ids_by_role_id(cls, role_id) -> List[int]:
+        """Returns the message_ids of all the ReactRoles that map an emoji to the given role"""
+        return list(
+            ReactRoleEmoji.objects.filter(role_id=role_id).values_list('react_role_id', flat=True).distinct()
+        )
+
+    @classmethod
+    @sync_to_async
+    def remove_role(cls, role_id) -> List[int]:
+        """Removes the given role from every ReactRole and returns the message_ids of the ReactRoles it was on"""
+        with transaction.atomic():
+            emoji_roles_by_message_id = {}
+            for message_id, emoji, emoji_role_id in ReactRoleEmoji.objects.filter(
+                    react_role_id__in=ReactRoleEmoji.objects.filter(role_id=role_id).values('react_role_id')
+            ).values_list('react_role_id', 'emoji', 'role_id'):
+                emoji_roles = emoji_roles_by_message_id.setdefault(message_id, {})
+                if emoji_role_id != role_id:
+                    emoji_roles[emoji] = emoji_role_id
+            cls._save_emoji_roles(emoji_roles_by_message_id)
+        return list(emoji_roles_by_message_id.keys())
 
     @classmethod
     @sync_to_async
@@ -62,6 +165,15 @@ class ReactRole(models.Model):
         """Returns list of ReactRole with message_id and emoji_roles_json """
         return list(ReactRole.objects.values('message_id', 'emoji_roles_json'))
 
+    @classmethod
+    @sync_to_async
+    def get_all_emoji_roles_by_message_id(cls) -> dict:
+        """Returns a dict of the emoji => role_id dict for each ReactRole keyed by message_id"""
+        emoji_roles_by_message_id = {}
+        for message_id, emoji, role_id in ReactRoleEmoji.objects.values_list('react_role_id', 'emoji', 'role_id'):
+            emoji_roles_by_message_id.setdefault(message_id, {})[emoji] = role_id
+        return emoji_roles_by_message_id
+
     @classmethod
     @sync_to_async
     def get_react_role_by_message_id(cls, message_id) -> ReactRole:
@@ -79,9 +191,13 @@ class ReactRole(models.Model):
     @sync_to_async
     def delete_react_role_by_message_id(cls, message_id) -> None:
         try:
+            # the ReactRoleEmojis for the message are deleted along with it
             ReactRole.objects.get(message_id=message_id).delete()
         except Exception:
             pass
+        react_role_registry = ReactRoleRegistry.active()
+        if react_role_registry is not None:
+            react_role_registry.remove_message(message_id)
 
     def __str__(self):
         return (
@@ -91,6 +207,76 @@ class ReactRole(models.Model):
             f'emoji_roles_json = {self.emoji_roles_json}'
         )
 
+
+class ReactRoleEmoji(models.Model):
+    react_role = models.ForeignKey(
+        ReactRole, to_field='message_id', db_column='message_id', related_name='emoji_roles', on_delete=models.CASCADE
+    )
+    emoji = models.CharField(max_length=200, null=False)
+    role_id = models.BigIntegerField(null=False, db_index=True)
+
+    class Meta:
+        db_table = 'wall_e_models_react_role_emojis'
+        constraints = [
+            UniqueConstraint(fields=['react_role', 'emoji'], name='unique_react_role_emoji')
+        ]
+
+    def __str__(self):
+        return f'message_id = {self.react_role_id}, emoji = {self.emoji}, role_id = {self.role_id}'
+
+
+class ReactRoleRegistry:
+    """
+    In-memory copy of the emoji => role_id mappings of every ReactRole message so that reaction events can be
+    resolved without querying the database.
+
+    Enable it with ReactRoleRegistry.enable() when the bot starts up. The ReactRole methods that change the
+    mappings keep it up to date after that.
+    """
+    _active = None
+
+    def __init__(self):
+        self._emoji_roles = {}
+
+    @classmethod
+    def active(cls) -> ReactRoleRegistry | None:
+        return cls._active
+
+    @classmethod
+    async def enable(cls) -> ReactRoleRegistry:
+        if cls._active is None:
+            react_role_registry = ReactRoleRegistry()
+            for message_id, emoji_roles in (await ReactRole.get_all_emoji_roles_by_message_id()).items():
+                react_role_registry.set_emoji_roles(message_id, emoji_roles)
+            cls._active = react_role_registry
+        return cls._active
+
+    @classmethod
+    def disable(cls):
+        cls._active = None
+
+    def set_emoji_roles(self, message_id, emoji_roles: dict):
+        # the dict is replaced rather than modified so that lookups from other threads never see a partial update
+        self._emoji_roles[int(message_id)] = {emoji: int(role_id) for emoji, role_id in emoji_roles.items()}
+
+    def remove_message(self, message_id):
+        self._emoji_roles.pop(int(message_id), None)
+
+    def is_react_role_message(self, message_id) -> bool:
+        return int(message_id) in self._emoji_roles
+
+    def get_emoji_roles(self, message_id) -> dict | None:
+        """Returns the emoji => role_id dict for the given message or None if it is not a ReactRole message"""
+        return self._emoji_roles.get(int(message_id))
+
+    def role_for(self, message_id, emoji) -> int | None:
+        """Returns the role_id mapped to the emoji on the given message or None if there isn't one"""
+        emoji_roles = self._emoji_roles.get(int(message_id))
+        if emoji_roles is None:
+            return None
+        return emoji_roles.get(emoji)
+
+
 class BanRecord(models.Model):
     username = models.CharField(max_length=37, null=False)
     user_id = models.BigIntegerField(null=False)
@@ -100,28 +286,109 @@ class BanRecord(models.Model):
     reason = models.CharField(max_length=512, null=False)
     unban_date = PSTDateTimeField(null=True, default=None)
 
+    # lower-cased username and text form of the user_id that the search in search_active_bans uses so that it can
+    # use indexes instead of converting every row
+    normalized_username = models.CharField(max_length=37, default=None, null=True, db_index=True)
+    user_id_text = models.CharField(max_length=20, default=None, null=True, db_index=True)
+
+    SEARCH_PAGE_SIZE = 25
+
     class Meta:
         db_table = 'wall_e_models_ban_records'
         constraints = [
             UniqueConstraint(fields=['user_id'], name='unique_active_ban', condition=Q(unban_date__isnull=True))
         ]
+        indexes = [
+            models.Index(
+                fields=['user_id'], name='ban_record_inactive_user_idx', condition=Q(unban_date__isnull=False)
+            )
+        ]
+        # the ban_record_active_ban_date_idx index that matches the ordering used by get_active_bans_page and
+        # get_all_active_bans is created in migration 0040 instead of here as sqlite does not support NULLS LAST
+        # in an index
+
+    @classmethod
+    async def insert_records(cls, records: List[BanRecord]) -> None:
+        """Adds entry to BanRecord table by delegating to bulk_ban, so the users that are already banned are skipped"""
+        await BanRecord.bulk_ban(records)
 
     @classmethod
     @sync_to_async
-    def insert_records(cls, records: List[BanRecord]) -> None:
-        """Adds entry to BanRecord table"""
-        BanRecord.objects.bulk_create(records)
+    def bulk_ban(cls, records: List[BanRecord]) -> List[BanRecord]:
+        """
+        Bans all the given users with a single INSERT, skipping the users that are already banned so that one of
+        them can not cause the whole batch to fail on the unique_active_ban constraint
+
+        Keyword Arguments
+        records -- the BanRecords to add
+
+        Return
+        list -- the BanRecords that were skipped as the user was already banned or appeared earlier in records
+        """
+        for attempt in (1, 2):
+            try:
+                with transaction.atomic():
+                    records_to_insert, skipped_records = BanRecord._split_out_banned_users(records)
+                    if len(records_to_insert) == 0:
+                        return skipped_records
+                    BanRecord.objects.bulk_create(records_to_insert)
+                    ActiveBansVersion.increment()
+                break
+            except IntegrityError:
+                # another process banned some of the users in the meantime, so the active bans are checked again
+                # and those users are skipped on the second attempt
+                if attempt == 2:
+                    raise
+        active_ban_cache = ActiveBanCache.active()
+        if active_ban_cache is not None:
+            active_ban_cache.add_bans({record.user_id: record.username for record in records_to_insert})
+        return skipped_records
+
+    @staticmethod
+    def _split_out_banned_users(records: List[BanRecord]):
+        """
+        Return
+        list -- the BanRecords of the users that are not banned yet, the first one for each user
+        list -- the BanRecords of the users that are already banned or appeared earlier in records
+        """
+        already_banned_user_ids = set(
+            BanRecord.objects.filter(
+                unban_date=None, user_id__in=[record.user_id for record in records]
+            ).values_list('user_id', flat=True)
+        )
+        records_to_insert = []
+        skipped_records = []
+        for record in records:
+            if record.user_id in already_banned_user_ids:
+                skipped_records.append(record)
+            else:
+                record.set_search_fields()
+                records_to_insert.append(record)
+                already_banned_user_ids.add(record.user_id)
+        return records_to_insert, skipped_records
 
     @classmethod
     @sync_to_async
     def insert_record(cls, record: BanRecord) -> None:
         """Adds entry to BanRecord table"""
-        record.save()
+        with transaction.atomic():
+            record.save()
+            ActiveBansVersion.increment()
+        active_ban_cache = ActiveBanCache.active()
+        if active_ban_cache is not None:
+            active_ban_cache.add_bans({record.user_id: record.username})
 
     @classmethod
     @sync_to_async
     def get_all_active_ban_user_ids(cls) -> dict:
         """Returns a dict of user_ids for all currently banned users"""
+        active_ban_cache = ActiveBanCache.active()
+        if active_ban_cache is not None:
+            return active_ban_cache.get_active_bans()
+        return BanRecord.load_active_ban_user_ids()
+
+    @classmethod
+    def load_active_ban_user_ids(cls) -> dict:
         return {
             user['user_id']: user['username']
             for user in list(BanRecord.objects.filter(unban_date=None).values('user_id', 'username'))
@@ -129,17 +396,149 @@ class BanRecord(models.Model):
 
     @classmethod
     @sync_to_async
-    def get_all_active_bans(cls, search_query=None) -> List[BanRecord]:
-        """Returns list of usernames and user_ids for all currently banned users"""
+    def get_all_active_bans(cls, search_query=None, match_substrings=True) -> List[BanRecord]:
+        """
+        Returns list of usernames and user_ids for all currently banned users
+
+        Keyword Arguments
+        search_query -- only returns the users whose username or user_id contains the search_query
+        match_substrings -- set to False to only return the users whose username or user_id starts with the
+         search_query, which can use the indexes instead of scanning every active ban. search_active_bans also
+         matches by prefix and pages and ranks the results.
+        """
         bans = BanRecord.objects.filter(unban_date=None).order_by(
             F('ban_date').desc(nulls_last=True)
         ).values('username', 'user_id', 'ban_date')
         if search_query is not None:
-            bans = bans.filter(
-                Q(username__icontains=search_query) | Q(user_id__contains=search_query)
-            )
+            search_query = f"{search_query}"
+            if match_substrings:
+                search_filter = (
+                    Q(normalized_username__contains=search_query.lower()) | Q(user_id_text__contains=search_query)
+                )
+            else:
+                search_filter = (
+                    BanRecord._prefix_filter('normalized_username', search_query.lower()) |
+                    BanRecord._prefix_filter('user_id_text', search_query)
+                )
+            bans = bans.filter(search_filter)
         return list(bans)
 
+    @classmethod
+    @sync_to_async
+    def search_active_bans(cls, search_query, page=0, page_size=None, match_substrings=False) -> List[dict]:
+        """
+        Searches the currently banned users by username and user_id
+
+        Keyword Arguments
+        search_query -- the username or user_id, or the start of one, to search for
+        page -- the page of results to return, starting from 0
+        page_size -- the number of results per page, defaults to SEARCH_PAGE_SIZE
+        match_substrings -- also returns the usernames that contain the search_query, which can not use the index
+         on normalized_username and scans every active ban
+
+        Return
+        list -- the username, user_id and ban_date of the matching bans. A user_id that exactly matches the
+         search_query is returned on its own, otherwise exact username matches come first, followed by the usernames
+         and user_ids that start with the search_query and lastly, with match_substrings, the usernames that contain
+         the search_query
+        """
+        page_size = BanRecord.SEARCH_PAGE_SIZE if page_size is None else page_size
+        search_query = f"{search_query}".strip()
+        normalized_search_query = search_query.lower()
+        active_bans = BanRecord.objects.filter(unban_date=None)
+        is_user_id = search_query.isdecimal() and int(search_query) <= models.BigIntegerField.MAX_BIGINT
+        if is_user_id:
+            exact_user_id_match = list(
+                active_bans.filter(user_id=int(search_query)).values('username', 'user_id', 'ban_date')
+            )
+            if len(exact_user_id_match) > 0:
+                return exact_user_id_match if page == 0 else []
+        if match_substrings:
+            search_filter = Q(normalized_username__contains=normalized_search_query)
+        else:
+            search_filter = BanRecord._prefix_filter('normalized_username', normalized_search_query)
+        if is_user_id:
+            search_filter |= BanRecord._prefix_filter('user_id_text', search_query)
+        bans = active_bans.filter(search_filter).annotate(
+            search_rank=Case(
+                When(normalized_username=normalized_search_query, then=Value(0)),
+                When(normalized_username__startswith=normalized_search_query, then=Value(1)),
+                When(user_id_text__startswith=search_query, then=Value(1)),
+                default=Value(2)
+            )
+        ).order_by(
+            'search_rank', F('ban_date').desc(nulls_last=True), 'id'
+        ).values('username', 'user_id', 'ban_date')
+        return list(bans[page * page_size:(page + 1) * page_size])
+
+    @classmethod
+    @sync_to_async
+    def get_active_bans_page(cls, cursor=None, page_size=None):
+        """
+        Returns a page of the currently banned users, ordered from most to least recently banned
+
+        Keyword Arguments
+        cursor -- the cursor returned with the previous page or None for the first page
+        page_size -- the number of bans per page, defaults to SEARCH_PAGE_SIZE
+
+        Return
+        list -- the username, user_id and ban_date of the bans on the page
+        str -- the cursor for the next page or None if this is the last page
+        int -- the count of all the active bans
+        """
+        page_size = BanRecord.SEARCH_PAGE_SIZE if page_size is None else page_size
+        active_bans = BanRecord.objects.filter(unban_date=None)
+        ban_date, ban_id = (None, None) if cursor is None else BanRecord._decode_page_cursor(cursor)
+        # the bans with a ban_date and the ones without are fetched separately so that each query can seek straight
+        # to the cursor in ban_record_active_ban_date_idx rather than reading through every ban before it
+        bans = []
+        if cursor is None:
+            bans = BanRecord._get_active_bans_after(active_bans.filter(ban_date__isnull=False), page_size + 1)
+        elif ban_date is not None:
+            bans = BanRecord._get_active_bans_after(
+                active_bans.filter(Q(ban_date__lte=ban_date) & (Q(ban_date__lt=ban_date) | Q(id__lt=ban_id))),
+                page_size + 1
+            )
+        if len(bans) <= page_size:
+            bans_without_ban_date = active_bans.filter(ban_date__isnull=True)
+            if ban_date is None and ban_id is not None:
+                bans_without_ban_date = bans_without_ban_date.filter(id__lt=ban_id)
+            bans += BanRecord._get_active_bans_after(bans_without_ban_date, page_size + 1 - len(bans))
+        active_bans_count = bans[0]['active_bans_count'] if len(bans) > 0 else active_bans.count()
+        next_cursor = None
+        if len(bans) > page_size:
+            bans = bans[:page_size]
+            next_cursor = BanRecord._encode_page_cursor(bans[-1]['ban_date'], bans[-1]['id'])
+        return [
+            {'username': ban['username'], 'user_id': ban['user_id'], 'ban_date': ban['ban_date']} for ban in bans
+        ], next_cursor, active_bans_count
+
+    @staticmethod
+    def _get_active_bans_after(bans, limit) -> List[dict]:
+        """Returns the first limit bans in the page order along with the count of all the active bans"""
+        return list(
+            bans.annotate(
+                active_bans_count=Subquery(
+                    BanRecord.objects.filter(unban_date=None).order_by().annotate(
+                        number_of_bans=Func(F('id'), function='COUNT')
+                    ).values('number_of_bans')
+                )
+            ).order_by(
+                F('ban_date').desc(nulls_last=True), F('id').desc()
+            ).values('id', 'username', 'user_id', 'ban_date', 'active_bans_count')[:limit]
+        )
+
+    @staticmethod
+    def _encode_page_cursor(ban_date, ban_id) -> str:
+        return base64.urlsafe_b64encode(json.dumps(
+            [None if ban_date is None else ban_date.utc.isoformat(), ban_id]
+        ).encode('utf-8')).decode('utf-8')
+
+    @staticmethod
+    def _decode_page_cursor(cursor):
+        ban_date, ban_id = json.loads(base64.urlsafe_b64decode(cursor.encode('utf-8')))
+        return None if ban_date is None else datetime.datetime.fromisoformat(ban_date), int(ban_id)
+
     @classmethod
     @sync_to_async
     def get_active_bans_count(cls) -> int:
@@ -157,15 +556,154 @@ class BanRecord(models.Model):
             return None
 
         user.unban_date = pstdatetime.now().pst
-        user.save()
+        with transaction.atomic():
+            user.save()
+            ActiveBansVersion.increment()
+        active_ban_cache = ActiveBanCache.active()
+        if active_ban_cache is not None:
+            active_ban_cache.remove_bans([user.user_id])
         return user.username
 
+    @classmethod
+    @sync_to_async
+    def bulk_unban(cls, user_ids: List[int]) -> dict:
+        """
+        Unbans all the given users with a single UPDATE
+
+        Keyword Arguments
+        user_ids -- the user_ids of the users to unban
+
+        Return
+        dict -- the username of each user that was unbanned, keyed by user_id. Users that were not banned are left out
+        """
+        with transaction.atomic():
+            bans = BanRecord.objects.select_for_update().filter(unban_date=None, user_id__in=user_ids)
+            unbanned_users = dict(bans.values_list('user_id', 'username'))
+            if len(unbanned_users) == 0:
+                return unbanned_users
+            BanRecord.objects.filter(unban_date=None, user_id__in=list(unbanned_users.keys())).update(
+                unban_date=pstdatetime.now().pst
+            )
+            ActiveBansVersion.increment()
+        active_ban_cache = ActiveBanCache.active()
+        if active_ban_cache is not None:
+            active_ban_cache.remove_bans(unbanned_users.keys())
+        return unbanned_users
+
+    @staticmethod
+    def _prefix_filter(field_name, prefix) -> Q:
+        """
+        Matches the values of the given search column that start with prefix in a way that can use the column's index
+
+        Django gives the column a pattern index on postgres that LIKE 'prefix%' uses, but sqlite only uses an index
+        for LIKE on case-insensitive columns, so on sqlite the prefix is matched as a range of the values that sort
+        between the prefix and the prefix with its last character incremented
+        """
+        if connection.vendor != 'sqlite' or len(prefix) == 0 or ord(prefix[-1]) == sys.maxunicode:
+            return Q(**{f"{field_name}__startswith": prefix})
+        return Q(**{
+            f"{field_name}__gte": prefix,
+            f"{field_name}__lt": f"{prefix[:-1]}{chr(ord(prefix[-1]) + 1)}"
+        })
+
+    def set_search_fields(self):
+        # migration 0039 backfills normalized_username with the same str.lower() so that both agree on non-ASCII names
+        self.normalized_username = self.username.lower() if self.username is not None else None
+        self.user_id_text = f"{self.user_id}" if self.user_id is not None else None
+
+    def save(self, *args, **kwargs):
+        self.set_search_fields()
+        super(BanRecord, self).save(*args, **kwargs)
+
     def __str__(self) -> str:
         return f"id=[{self.id}] username=[{self.username}] user_id=[{self.user_id}] " \
                f"mod=[{self.mod}] mod_id=[{self.mod_id}] date=[{self.ban_date}] reason=[{self.reason}]" \
                f"unban_date=[{self.unban_date}]"
 
 
+class ActiveBansVersion(models.Model):
+    """
+    Single row counter that is incremented whenever the active bans change so that each process with an
+    ActiveBanCache can cheaply check if its cache is out of date
+    """
+    version = models.BigIntegerField(
+        default=0
+    )
+
+    @staticmethod
+    def get_version() -> int:
+        active_bans_version = ActiveBansVersion.objects.all().values_list('version', flat=True).first()
+        return 0 if active_bans_version is None else active_bans_version
+
+    @staticmethod
+    def increment():
+        if ActiveBansVersion.objects.all().update(version=F('version') + 1) == 0:
+            ActiveBansVersion.objects.create(version=1)
+
+
+class ActiveBanCache:
+    """
+    In-process copy of the user_id => username of all the active bans so that checking if a user is banned does not
+    need to query the database.
+
+    Enable it with ActiveBanCache.enable() when the bot starts up. BanRecord.insert_record, BanRecord.bulk_ban,
+    BanRecord.unban_by_id and BanRecord.bulk_unban keep it up to date after that. The version of the active bans it was loaded at is
+    tracked so that is_stale() can detect changes made by other processes with a single query.
+    """
+    _active = None
+
+    def __init__(self, active_bans, version):
+        self._active_bans = active_bans
+        self.version = version
+
+    @classmethod
+    def active(cls) -> ActiveBanCache | None:
+        return cls._active
+
+    @classmethod
+    @sync_to_async
+    def enable(cls) -> ActiveBanCache:
+        if cls._active is None:
+            cls._active = ActiveBanCache(*ActiveBanCache._load())
+        return cls._active
+
+    @classmethod
+    def disable(cls):
+        cls._active = None
+
+    @staticmethod
+    def _load():
+        with transaction.atomic():
+            return BanRecord.load_active_ban_user_ids(), ActiveBansVersion.get_version()
+
+    def is_banned(self, user_id) -> bool:
+        return user_id in self._active_bans
+
+    def get_active_bans(self) -> dict:
+        """Returns a copy of the dict of user_id => username for all currently banned users"""
+        return dict(self._active_bans)
+
+    def add_bans(self, active_bans: dict):
+        """Records the bans that this process just saved along with the ActiveBansVersion.increment() it did"""
+        self._active_bans.update(active_bans)
+        self.version += 1
+
+    def remove_bans(self, user_ids):
+        """Records the unbans that this process just saved along with the ActiveBansVersion.increment() it did"""
+        for user_id in user_ids:
+            self._active_bans.pop(user_id, None)
+        self.version += 1
+
+    @sync_to_async
+    def is_stale(self) -> bool:
+        """Returns True if the active bans have been changed by another process since the cache was loaded"""
+        return ActiveBansVersion.get_version() != self.version
+
+    @sync_to_async
+    def reload(self):
+        self._active_bans, self.version = ActiveBanCache._load()
+
+
 class CommandStat(models.Model):
     epoch_time = models.BigAutoField(
         primary_key=True
@@ -197,6 +735,16 @@ class CommandStat(models.Model):
         blank=True, null=True
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['year', 'month', 'day', 'hour'], name='command_stat_hour_idx')
+        ]
+
+    MAX_INSERT_ATTEMPTS = 5
+
+    _latest_epoch_time = None
+    _epoch_time_lock = threading.Lock()
+
     @classmethod
     def get_column_headers_from_database(cls):
         return [key for key in model_to_dict(CommandStat) if key != "epoch_time"]
@@ -206,28 +754,188 @@ class CommandStat(models.Model):
     def get_all_entries(cls):
         return list(CommandStat.objects.all())
 
+    @classmethod
+    async def stream_entries(cls, start_date=None, end_date=None, chunk_size=2000):
+        """
+        Yields the CommandStats one chunk at a time so that the whole table does not need to be held in memory
+
+        Keyword Arguments
+        start_date -- the datetime for the earliest hour to include, see get_date_range_filter for how
+         timezones are handled
+        end_date -- the datetime for the latest hour to include
+        chunk_size -- the number of rows to fetch from the database at a time
+
+        Return
+        tuple -- the values of each CommandStat in the order of get_column_headers_from_database()
+        """
+        command_stats = CommandStat.objects.filter(
+            CommandStat.get_date_range_filter(start_date, end_date)
+        ).order_by('epoch_time').values_list(
+            *CommandStat.get_column_headers_from_database()
+        ).iterator(chunk_size=chunk_size)
+        get_next_chunk = sync_to_async(lambda: list(itertools.islice(command_stats, chunk_size)))
+        while True:
+            chunk = await get_next_chunk()
+            if len(chunk) == 0:
+                return
+            for command_stat in chunk:
+                yield command_stat
+
+    @classmethod
+    async def write_csv(cls, file, start_date=None, end_date=None, chunk_size=2000) -> int:
+        """
+        Writes the CommandStats as CSV to the given file-like object, with a header row of the column names
+
+        Keyword Arguments
+        file -- the file-like object opened in text mode to write the CSV to
+        start_date -- the datetime for the earliest hour to include, see get_date_range_filter for how
+         timezones are handled
+        end_date -- the datetime for the latest hour to include
+        chunk_size -- the number of rows to fetch from the database at a time
+
+        Return
+        int -- the number of CommandStats written
+        """
+        csv_writer = csv.writer(file)
+        csv_writer.writerow(CommandStat.get_column_headers_from_database())
+        number_of_command_stats = 0
+        async for command_stat in CommandStat.stream_entries(
+                start_date=start_date, end_date=end_date, chunk_size=chunk_size):
+            csv_writer.writerow(command_stat)
+            number_of_command_stats += 1
+        return number_of_command_stats
+
     @classmethod
     @sync_to_async
     def save_command_stat(cls, command_stat):
-        while True:
+        """Saves the CommandStat, or queues it if the CommandStatBuffer is enabled"""
+        command_stat_buffer = CommandStatBuffer.active()
+        if command_stat_buffer is not None:
+            command_stat_buffer.add(command_stat)
+            return
+        CommandStat.insert_with_unique_epoch_time(command_stat)
+
+    @classmethod
+    def insert_with_unique_epoch_time(cls, command_stat):
+        """
+        Inserts the CommandStat with an epoch_time from next_epoch_time(), trying again with a new epoch_time if
+        another process has already saved a CommandStat with that epoch_time
+
+        Any other IntegrityError, such as a column that can not be null, is raised straight away and the epoch_time
+        collision is raised too once MAX_INSERT_ATTEMPTS have been made
+        """
+        for attempt in range(1, cls.MAX_INSERT_ATTEMPTS + 1):
+            command_stat.epoch_time = CommandStat.next_epoch_time(command_stat.epoch_time)
             try:
-                command_stat.save()
+                command_stat.save(force_insert=True)
                 return
-            except Exception:
-                command_stat.epoch_time += 1
+            except IntegrityError:
+                epoch_time_collided = CommandStat.objects.filter(epoch_time=command_stat.epoch_time).exists()
+                if not epoch_time_collided or attempt == cls.MAX_INSERT_ATTEMPTS:
+                    raise
+                # reloading the latest epoch_time from the database rather than trying the ones after it one by one
+                with cls._epoch_time_lock:
+                    cls._latest_epoch_time = None
 
     @classmethod
-    async def get_command_stats_dict(cls, filters=None):
-        filter_stats_dict = {}
-        for command_stat in await CommandStat.get_all_entries():
-            command_stat = model_to_dict(command_stat)
-            key = ""
-            for idx, command_filter in enumerate(filters):
-                key += f"{command_stat[command_filter]}"
-                if idx + 1 < len(filters):
-                    key += "-"
-            filter_stats_dict[key] = filter_stats_dict.get(key, 0) + 1
-        return filter_stats_dict
+    def next_epoch_time(cls, epoch_time=None) -> int:
+        """
+        Returns a primary key for a new CommandStat that is as close to the given epoch_time as possible while
+        still being higher than any epoch_time that was already used, so that inserts do not collide
+
+        Keyword Arguments
+        epoch_time -- the epoch_time the CommandStat was created with, the current time is used if not specified
+        """
+        epoch_time = int(time.time()) if epoch_time is None else int(epoch_time)
+        with cls._epoch_time_lock:
+            if cls._latest_epoch_time is None:
+                cls._latest_epoch_time = CommandStat.objects.aggregate(
+                    latest_epoch_time=Max('epoch_time')
+                )['latest_epoch_time'] or 0
+            cls._latest_epoch_time = max(cls._latest_epoch_time + 1, epoch_time)
+            return cls._latest_epoch_time
+
+    @staticmethod
+    def convert_to_storage_timezone(date):
+        """
+        Converts a timezone aware datetime to the timezone that timezone.now uses for the year, month, day and hour
+        columns, which is UTC when USE_TZ is enabled and the TIME_ZONE setting otherwise
+        """
+        if date is None or timezone.is_naive(date):
+            return date
+        return date.astimezone(datetime.timezone.utc) if settings.USE_TZ else timezone.make_naive(date)
+
+    @classmethod
+    def get_date_range_filter(cls, start_date=None, end_date=None):
+        """
+        Creates the filter for the CommandStats that were logged within the given hours
+
+        The year, month, day and hour columns hold the time from timezone.now, so timezone aware datetimes, such as
+        pstdatetime.now(), are converted to that timezone before their fields are compared. Naive datetimes are
+        assumed to already be in that timezone.
+
+        Keyword Arguments
+        start_date -- the datetime for the earliest hour to include
+        end_date -- the datetime for the latest hour to include
+
+        Return
+        Q -- the filter that matches the year, month, day and hour columns against the date range
+        """
+        date_range_filter = Q()
+        start_date = CommandStat.convert_to_storage_timezone(start_date)
+        end_date = CommandStat.convert_to_storage_timezone(end_date)
+        if start_date is not None:
+            date_range_filter &= (
+                Q(year__gt=start_date.year) |
+                Q(year=start_date.year, month__gt=start_date.month) |
+                Q(year=start_date.year, month=start_date.month, day__gt=start_date.day) |
+                Q(year=start_date.year, month=start_date.month, day=start_date.day, hour__gte=start_date.hour)
+            )
+        if end_date is not None:
+            date_range_filter &= (
+                Q(year__lt=end_date.year) |
+                Q(year=end_date.year, month__lt=end_date.month) |
+                Q(year=end_date.year, month=end_date.month, day__lt=end_date.day) |
+                Q(year=end_date.year, month=end_date.month, day=end_date.day, hour__lte=end_date.hour)
+            )
+        return date_range_filter
+
+    @classmethod
+    @sync_to_async
+    def get_command_stats_dict(cls, filters=None, start_date=None, end_date=None, limit=None):
+        """
+        Counts the CommandStats grouped by the given filters
+
+        Keyword Arguments
+        filters -- the list of CommandStat columns to group the counts by
+        start_date -- the datetime for the earliest hour to include in the counts, see get_date_range_filter for how
+         timezones are handled
+        end_date -- the datetime for the latest hour to include in the counts
+        limit -- the maximum number of groups to return, the groups with the highest count are returned
+
+        Return
+        dict -- the counts keyed by the values of the filters joined by "-"
+        """
+        filters = [] if filters is None else list(filters)
+        date_range_filter = CommandStat.get_date_range_filter(start_date, end_date)
+        if set(filters).issubset(CommandStatRollup.ROLLUP_FIELDS):
+            # the hourly rollup has all the columns needed, so there is no need to scan the raw CommandStats
+            command_stats = CommandStatRollup.objects.filter(date_range_filter)
+            number_of_commands = Sum('number_of_commands')
+        else:
+            command_stats = CommandStat.objects.filter(date_range_filter)
+            number_of_commands = Count('epoch_time')
+        if len(filters) == 0:
+            return {"": command_stats.aggregate(number_of_commands=number_of_commands)['number_of_commands'] or 0}
+        command_stats = command_stats.values(*filters).annotate(number_of_commands=number_of_commands)
+        if limit is not None:
+            command_stats = command_stats.order_by('-number_of_commands')[:limit]
+        else:
+            command_stats = command_stats.order_by()
+        return {
+            "-".join(f"{command_stat[command_filter]}" for command_filter in filters): command_stat['number_of_commands']
+            for command_stat in command_stats
+        }
 
     def __str__(self):
         return \
@@ -235,7 +943,8 @@ class CommandStat(models.Model):
             f"subcommand {self.invoked_subcommand} and year {self.year}, " \
             f"month {self.month} and hour {self.hour}"
 
-    def save(self, *args, **kwargs):
+    def set_date_fields(self):
+        """Converts the datetimes that year, month, day and hour default to into their integer values"""
         if type(self.year) == datetime.datetime:
             self.year = self.year.year
         if type(self.month) == datetime.datetime:
@@ -244,7 +953,229 @@ class CommandStat(models.Model):
             self.day = self.day.day
         if type(self.hour) == datetime.datetime:
             self.hour = self.hour.hour
-        super(CommandStat, self).save(*args, **kwargs)
+
+    def save(self, *args, **kwargs):
+        self.set_date_fields()
+        # the CommandStatRollup is updated by the post_save receiver, so the atomic block keeps the two in step
+        with transaction.atomic():
+            super(CommandStat, self).save(*args, **kwargs)
+
+
+class PeriodicFlushBuffer:
+    """
+    Base for the opt-in buffers that hold writes in memory and save them together, every flush_interval seconds or
+    sooner once the buffer is full. Subclasses implement add(), which calls _flush_and_log_errors() when the buffer is
+    full, and flush(), which saves everything held, keeps what it could not save for the next flush and returns the
+    number of writes saved.
+
+    Enable a buffer with enable(logger) from within the bot's event loop and make sure disable() is awaited on
+    shutdown so that the writes that are still held are saved.
+    """
+    _active = None
+
+    def __init__(self, logger, flush_interval):
+        self.logger = logger
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_task = None
+
+    @classmethod
+    def active(cls) -> PeriodicFlushBuffer | None:
+        return cls._active
+
+    @classmethod
+    def enable(cls, logger, **kwargs) -> PeriodicFlushBuffer:
+        """
+        Turns on the buffer and starts the periodic flush on the running loop
+
+        Keyword Arguments
+        logger -- the logger to report the flushes that fail with
+        kwargs -- the flush_interval and size limit to create the buffer with
+        """
+        if cls._active is None:
+            cls._active = cls(logger, **kwargs)
+            cls._active._flush_task = asyncio.get_running_loop().create_task(cls._active._flush_periodically())
+        return cls._active
+
+    @classmethod
+    async def disable(cls):
+        """Turns off the buffer after saving the writes that it is still holding"""
+        buffer = cls._active
+        if buffer is None:
+            return
+        cls._active = None
+        if buffer._flush_task is not None:
+            buffer._flush_task.cancel()
+            buffer._flush_task = None
+        await sync_to_async(buffer.flush)()
+
+    def add(self, write):
+        raise NotImplementedError
+
+    def flush(self) -> int:
+        raise NotImplementedError
+
+    def _flush_and_log_errors(self):
+        try:
+            self.flush()
+        except Exception as e:
+            self.logger.error(
+                f"[wall_e_models models.py {type(self).__name__}._flush_and_log_errors()] unable to save the "
+                f"buffered writes, they will be saved with the next flush\n{e}"
+            )
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await sync_to_async(self._flush_and_log_errors)()
+
+
+class CommandStatBuffer(PeriodicFlushBuffer):
+    """
+    Opt-in buffer for CommandStat.save_command_stat that queues the CommandStats in memory and writes them with a
+    single bulk_create every flush_interval seconds or as soon as max_batch_size is reached, whichever comes first.
+
+    The primary keys are assigned from CommandStat.next_epoch_time() when a CommandStat is queued, so the
+    bulk_create only fails on colliding keys if another process is saving CommandStats too. When the bulk_create
+    fails with an IntegrityError the batch is saved one CommandStat at a time instead, which gives the colliding
+    CommandStats new keys and drops any CommandStat that can not be saved.
+    """
+    _active = None
+
+    def __init__(self, logger, flush_interval=30, max_batch_size=200):
+        super(CommandStatBuffer, self).__init__(logger, flush_interval)
+        self.max_batch_size = max_batch_size
+        self._queued_command_stats = []
+
+    def add(self, command_stat: CommandStat):
+        command_stat.set_date_fields()
+        command_stat.epoch_time = CommandStat.next_epoch_time(command_stat.epoch_time)
+        with self._lock:
+            self._queued_command_stats.append(command_stat)
+            flush_needed = len(self._queued_command_stats) >= self.max_batch_size
+        if flush_needed:
+            self._flush_and_log_errors()
+
+    def flush(self) -> int:
+        """Saves all the queued CommandStats and returns how many were saved"""
+        with self._lock:
+            command_stats = self._queued_command_stats
+            self._queued_command_stats = []
+        if len(command_stats) == 0:
+            return 0
+        try:
+            with transaction.atomic():
+                CommandStat.objects.bulk_create(command_stats)
+                CommandStatRollup.add_command_stats(command_stats)
+        except IntegrityError:
+            return self._insert_one_at_a_time(command_stats)
+        except Exception:
+            self._requeue(command_stats)
+            raise
+        return len(command_stats)
+
+    def _insert_one_at_a_time(self, command_stats: List[CommandStat]) -> int:
+        number_of_command_stats_saved = 0
+        for index, command_stat in enumerate(command_stats):
+            try:
+                CommandStat.insert_with_unique_epoch_time(command_stat)
+                number_of_command_stats_saved += 1
+            except IntegrityError as e:
+                self.logger.error(
+                    "[wall_e_models models.py CommandStatBuffer._insert_one_at_a_time()] dropping the CommandStat "
+                    f"\"{command_stat}\" as it could not be saved\n{e}"
+                )
+            except Exception:
+                self._requeue(command_stats[index:])
+                raise
+        return number_of_command_stats_saved
+
+    def _requeue(self, command_stats: List[CommandStat]):
+        with self._lock:
+            self._queued_command_stats = command_stats + self._queued_command_stats
+
+
+class CommandStatRollup(models.Model):
+    """
+    Number of commands run per hour, channel, command and invoked_with, kept up to date as new CommandStats are saved
+    so that the stats queries do not need to scan every CommandStat ever logged
+    """
+    year = models.IntegerField()
+    month = models.IntegerField()
+    day = models.IntegerField()
+    hour = models.IntegerField()
+    channel_name = models.CharField(
+        max_length=2000,
+        default='NA'
+    )
+    command = models.CharField(
+        max_length=2000
+    )
+    invoked_with = models.CharField(
+        max_length=2000
+    )
+    number_of_commands = models.PositiveBigIntegerField(
+        default=0
+    )
+
+    ROLLUP_FIELDS = ['year', 'month', 'day', 'hour', 'channel_name', 'command', 'invoked_with']
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=['year', 'month', 'day', 'hour', 'channel_name', 'command', 'invoked_with'],
+                name='unique_command_stat_rollup'
+            )
+        ]
+
+    @classmethod
+    def add_command_stats(cls, command_stats: List[CommandStat]):
+        """Adds the given newly saved CommandStats to the counts of their hour"""
+        new_command_counts = {}
+        for command_stat in command_stats:
+            rollup_key = tuple(getattr(command_stat, field) for field in CommandStatRollup.ROLLUP_FIELDS)
+            new_command_counts[rollup_key] = new_command_counts.get(rollup_key, 0) + 1
+        for rollup_key, number_of_new_commands in new_command_counts.items():
+            rollup_filter = dict(zip(CommandStatRollup.ROLLUP_FIELDS, rollup_key))
+            rollup = CommandStatRollup.objects.filter(**rollup_filter)
+            if rollup.update(number_of_commands=F('number_of_commands') + number_of_new_commands) > 0:
+                continue
+            try:
+                with transaction.atomic():
+                    CommandStatRollup.objects.create(number_of_commands=number_of_new_commands, **rollup_filter)
+            except IntegrityError:
+                # another process created the count for this hour in the meantime
+                rollup.update(number_of_commands=F('number_of_commands') + number_of_new_commands)
+
+    @classmethod
+    @sync_to_async
+    def backfill(cls) -> int:
+        """Rebuilds all the counts from the CommandStat table and returns the number of counts created"""
+        with transaction.atomic():
+            CommandStatRollup.objects.all().delete()
+            rollups = CommandStatRollup.objects.bulk_create(
+                [
+                    CommandStatRollup(**rollup)
+                    for rollup in CommandStat.objects.values(*CommandStatRollup.ROLLUP_FIELDS).annotate(
+                        number_of_commands=Count('epoch_time')
+                    ).order_by().iterator()
+                ],
+                batch_size=1000
+            )
+        return len(rollups)
+
+    def __str__(self):
+        return (
+            f"{self.number_of_commands} runs of {self.command} as invoked with {self.invoked_with} in channel "
+            f"{self.channel_name} on {self.year}-{self.month}-{self.day} hour {self.hour}"
+        )
+
+
+@receiver(post_save, sender=CommandStat)
+def add_inserted_command_stat_to_rollup(sender, instance, created, **kwargs):
+    """Counts each CommandStat that save() inserted, the ones that save() only updated are already counted"""
+    if created:
+        CommandStatRollup.add_command_stats([instance])
 
 
 class ProfileBucketInProgress(models.Model):
@@ -364,6 +1295,27 @@ class UserPoint(models.Model):
         default=False
     )
 
+    # the columns that update_leveling_profile_info can change
+    PROFILE_FIELDS = [
+        'name', 'nickname', 'avatar_url', 'leveling_message_avatar_url', 'avatar_url_message_id',
+        'discord_avatar_link_expiry_date', 'deleted_date', 'outsized_profile_pic', 'leveling_update_attempt'
+    ]
+
+    # the largest avatar in bytes that will be uploaded to the avatar channel, anything larger is treated as an
+    # outsized profile pic without attempting the upload
+    MAX_AVATAR_SIZE = 10 * 1024 * 1024
+
+    class Meta:
+        indexes = [
+            # ordering by points in load_to_cache and counting the users above a user in get_rank
+            models.Index(fields=['points', 'id'], name='user_point_points_idx'),
+            models.Index(fields=['bucket_number', 'points'], name='user_point_bucket_idx'),
+            models.Index(
+                fields=['discord_avatar_link_expiry_date'], name='user_point_avatar_expiry_idx',
+                condition=Q(outsized_profile_pic=False, discord_avatar_link_expiry_date__isnull=False)
+            ),
+        ]
+
     @sync_to_async
     def async_save(self):
         self.save()
@@ -388,13 +1340,7 @@ class UserPoint(models.Model):
 
     @classmethod
     def calculate_level_up_specific_points(cls, points):
-        index = 0
-        levels = Level.objects.all().order_by('total_points_required')
-        while levels[index].xp_needed_to_level_up_to_next_level < points and index < len(levels):
-            points -= levels[index].xp_needed_to_level_up_to_next_level
-            index += 1
-
-        return points
+        return LevelIndex.get().locate(points)[1]
 
     @sync_to_async
     def increment_points(self):
@@ -405,28 +1351,87 @@ class UserPoint(models.Model):
             self.level_up_specific_points += point
             self.message_count += 1
             if self.level_number < 100:
-                current_level = Level.objects.get(number=self.level_number)
-                if self.level_up_specific_points >= current_level.xp_needed_to_level_up_to_next_level:
-                    self.level_up_specific_points -= current_level.xp_needed_to_level_up_to_next_level
+                xp_needed_to_level_up_to_next_level = LevelIndex.get().xp_needed(self.level_number)
+                if self.level_up_specific_points >= xp_needed_to_level_up_to_next_level:
+                    self.level_up_specific_points -= xp_needed_to_level_up_to_next_level
                     self.level_number += 1
                     alert_user = True
             self.latest_time_xp_was_earned_epoch = datetime.datetime.now().timestamp()
-            self.save()
+            write_behind = UserPointWriteBehind.active()
+            if write_behind is None:
+                self.save()
+            else:
+                write_behind.add(self)
         return alert_user
 
+    @sync_to_async
+    def increment_points_atomically(self):
+        """
+        Alternative to increment_points that only writes the XP columns and does the increment in the database so
+        that concurrent messages from the same user can not lose XP. The cooldown is checked as part of the UPDATE.
+
+        Return
+        int -- the user's level after the increment or None if the message did not count towards points
+        """
+        point = random.randint(15, 25)
+        now = datetime.datetime.now().timestamp()
+        user_points = UserPoint.objects.filter(user_id=self.user_id)
+        message_counted = user_points.filter(
+            latest_time_xp_was_earned_epoch__lt=now - datetime.timedelta(minutes=1).total_seconds()
+        ).update(
+            points=F('points') + point,
+            level_up_specific_points=F('level_up_specific_points') + point,
+            message_count=F('message_count') + 1,
+            latest_time_xp_was_earned_epoch=now
+        )
+        if message_counted == 0:
+            return None
+        xp_fields = user_points.values('points', 'level_up_specific_points', 'message_count', 'level_number').get()
+        if xp_fields['level_number'] < 100:
+            xp_needed_to_level_up_to_next_level = LevelIndex.get().xp_needed(xp_fields['level_number'])
+            if xp_fields['level_up_specific_points'] >= xp_needed_to_level_up_to_next_level:
+                # only levelling up the user if another message has not already done so
+                leveled_up = user_points.filter(level_number=xp_fields['level_number']).update(
+                    level_up_specific_points=F('level_up_specific_points') - xp_needed_to_level_up_to_next_level,
+                    level_number=F('level_number') + 1
+                )
+                if leveled_up:
+                    xp_fields = user_points.values(
+                        'points', 'level_up_specific_points', 'message_count', 'level_number'
+                    ).get()
+        self.points = xp_fields['points']
+        self.level_up_specific_points = xp_fields['level_up_specific_points']
+        self.message_count = xp_fields['message_count']
+        self.level_number = xp_fields['level_number']
+        self.latest_time_xp_was_earned_epoch = now
+        return self.level_number
+
     @sync_to_async
     def get_rank(self):
-        users_above_in_rank = []
-        for user in UserPoint.objects.all().order_by('-points'):
-            if user.user_id != self.user_id:
-                users_above_in_rank.append(user)
-            else:
-                return len(users_above_in_rank) + 1
-        return len(users_above_in_rank) + 1
+        # users with the same amount of points are ranked by the order they were added to the table
+        return UserPoint.objects.filter(
+            Q(points__gt=self.points) | Q(points=self.points, id__lt=self.id)
+        ).count() + 1
+
+    @staticmethod
+    @sync_to_async
+    def get_ranks(user_ids) -> dict:
+        """Returns a dict of the rank for each of the given user_ids that exists in the UserPoint table"""
+        users_above_in_rank = UserPoint.objects.filter(
+            Q(points__gt=OuterRef('points')) | Q(points=OuterRef('points'), id__lt=OuterRef('id'))
+        ).order_by().annotate(
+            number_of_users=Func(F('id'), function='COUNT')
+        ).values('number_of_users')
+        return {
+            user_id: number_of_users_above_in_rank + 1
+            for user_id, number_of_users_above_in_rank in UserPoint.objects.filter(user_id__in=user_ids).annotate(
+                number_of_users_above_in_rank=Subquery(users_above_in_rank)
+            ).values_list('user_id', 'number_of_users_above_in_rank')
+        }
 
     @sync_to_async
     def get_xp_needed_to_level_up_to_next_level(self):
-        return Level.objects.get(number=self.level_number).xp_needed_to_level_up_to_next_level
+        return LevelIndex.get().xp_needed(self.level_number)
 
     @sync_to_async
     def hide_xp(self):
@@ -446,30 +1451,35 @@ class UserPoint(models.Model):
 
     @staticmethod
     @sync_to_async
-    def reset_attempts_and_process_status(logger):
+    def reset_attempts_and_process_status(logger, max_number_of_user_to_update_at_once=10000) -> int:
+        """
+        Resets the concurrent_attempts, being_processed and leveling_update_attempt of every user that needs it,
+        using id ranges of max_number_of_user_to_update_at_once users per UPDATE so that a large table is not locked
+        by a single statement
+
+        Return
+        int -- the number of users that were reset
+        """
         logger.debug("[Leveling reset_attempts_and_process_status()] starting")
-        all_user_points = UserPoint.objects.all()
-        user_point_ids_to_update = all_user_points.values_list('user_id', flat=True)
-        number_of_users_to_update = len(user_point_ids_to_update)
-        max_number_of_user_to_update_at_once = 1000
-        start_index = 0
-        while start_index <  number_of_users_to_update:
-            end_index = start_index + max_number_of_user_to_update_at_once
-            logger.debug(
-                f"[Leveling reset_attempts_and_process_status()] attempting to update users from index "
-                f"{start_index} to {end_index}"
-            )
-            user_ids_to_update = user_point_ids_to_update[start_index:end_index]
-            user_to_update = all_user_points.filter(user_id__in=user_ids_to_update)
-            user_to_update.update(concurrent_attempts=0)
-            user_to_update.update(being_processed=False)
-            user_to_update.update(leveling_update_attempt=0)
-            UserPoint.objects.bulk_update(
-                user_to_update,
-                ['concurrent_attempts', 'being_processed', 'leveling_update_attempt']
-            )
-            start_index = end_index
-        logger.debug("[Leveling reset_attempts_and_process_status()] finished")
+        users_to_reset = UserPoint.objects.filter(
+            ~Q(concurrent_attempts=0) | Q(being_processed=True) | ~Q(leveling_update_attempt=0)
+        )
+        id_range = users_to_reset.aggregate(min_id=Min('id'), max_id=Max('id'))
+        number_of_users_reset = 0
+        if id_range['min_id'] is not None:
+            start_id = id_range['min_id']
+            while start_id <= id_range['max_id']:
+                end_id = start_id + max_number_of_user_to_update_at_once
+                logger.debug(
+                    f"[Leveling reset_attempts_and_process_status()] attempting to reset users with ids from "
+                    f"{start_id} up to {end_id}"
+                )
+                number_of_users_reset += users_to_reset.filter(id__gte=start_id, id__lt=end_id).update(
+                    concurrent_attempts=0, being_processed=False, leveling_update_attempt=0
+                )
+                start_id = end_id
+        logger.debug(f"[Leveling reset_attempts_and_process_status()] finished resetting {number_of_users_reset} users")
+        return number_of_users_reset
 
     @staticmethod
     @sync_to_async
@@ -506,28 +1516,86 @@ class UserPoint(models.Model):
                 f"[wall_e_models models.py set_avatar_link_expiry_date()] discord_avatar_link_expiry_date = "
                 f"{self.discord_avatar_link_expiry_date}"
             )
+            avatar_link_expiry_scheduler = AvatarLinkExpiryScheduler.active()
+            if avatar_link_expiry_scheduler is not None:
+                avatar_link_expiry_scheduler.schedule(self.user_id, self.discord_avatar_link_expiry_date)
         else:
             logger.error("fix the url for the user")
 
     @staticmethod
     def get_avatar_link_expiry_date(logger, url):
         logger.debug(f"[wall_e_models models.py get_avatar_link_expiry_date()] url = <{url}>")
-        query_params = {
-            query_param[:query_param.find("=")]: query_param[query_param.find("=") + 1:]
-            for query_param in url[url.index("?") + 1:].split("&")
-            if query_param.find("=") != -1
-        }
-        logger.debug(f"[wall_e_models models.py get_avatar_link_expiry_date()] query_params = {query_params}")
         link_expiry_time = pstdatetime.from_utc_datetime(
-            datetime.datetime.utcfromtimestamp(eval("0x" + query_params['ex'].strip()))
+            datetime.datetime.fromtimestamp(UserPoint.parse_avatar_link_expiry_epoch(url), datetime.timezone.utc)
         )
         logger.debug(f"[wall_e_models models.py get_avatar_link_expiry_date()] link_expiry_time = {link_expiry_time}")
         return link_expiry_time
 
+    @staticmethod
+    def parse_avatar_link_expiry_epoch(url) -> int:
+        """
+        Gets the epoch time that a discord CDN link expires at from its hex encoded "ex" query parameter
+
+        Keyword Arguments
+        url -- the discord CDN link
+
+        Return
+        int -- the epoch time that the link expires at, raises a ValueError if the link has no valid "ex" parameter
+        """
+        link_expiry = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query).get('ex')
+        if not link_expiry:
+            raise ValueError(f"no ex query parameter found in <{url}>")
+        return int(link_expiry[0].strip(), 16)
+
+    @staticmethod
+    @sync_to_async
+    def backfill_avatar_link_expiry_dates(logger, chunk_size=1000) -> int:
+        """
+        Recomputes discord_avatar_link_expiry_date from leveling_message_avatar_url for every user that has one
 
+        Keyword Arguments
+        logger -- the logger to use
+        chunk_size -- the number of users to read and bulk_update at a time
+
+        Return
+        int -- the number of users whose discord_avatar_link_expiry_date was changed
+        """
+        logger.debug("[wall_e_models models.py backfill_avatar_link_expiry_dates()] starting")
+        number_of_users_updated = 0
+        users_to_update = []
+        user_points = UserPoint.objects.filter(leveling_message_avatar_url__isnull=False).only(
+            'id', 'leveling_message_avatar_url', 'discord_avatar_link_expiry_date'
+        ).order_by('id').iterator(chunk_size=chunk_size)
+        for user_point in user_points:
+            try:
+                link_expiry_epoch = UserPoint.parse_avatar_link_expiry_epoch(user_point.leveling_message_avatar_url)
+            except ValueError as e:
+                logger.error(
+                    f"[wall_e_models models.py backfill_avatar_link_expiry_dates()] unable to parse the expiry for "
+                    f"UserPoint with id {user_point.id}\n{e}"
+                )
+                continue
+            current_expiry_date = user_point.discord_avatar_link_expiry_date
+            if current_expiry_date is not None and current_expiry_date.timestamp() == link_expiry_epoch:
+                continue
+            user_point.discord_avatar_link_expiry_date = pstdatetime.from_utc_datetime(
+                datetime.datetime.fromtimestamp(link_expiry_epoch, datetime.timezone.utc)
+            )
+            users_to_update.append(user_point)
+            if len(users_to_update) == chunk_size:
+                UserPoint.objects.bulk_update(users_to_update, ['discord_avatar_link_expiry_date'])
+                number_of_users_updated += len(users_to_update)
+                users_to_update = []
+        if len(users_to_update) > 0:
+            UserPoint.objects.bulk_update(users_to_update, ['discord_avatar_link_expiry_date'])
+            number_of_users_updated += len(users_to_update)
+        logger.debug(
+            f"[wall_e_models models.py backfill_avatar_link_expiry_dates()] updated {number_of_users_updated} users"
+        )
+        return number_of_users_updated
 
     async def update_leveling_profile_info(self, logger, guild_id, member, levelling_website_avatar_channel,
-                                           updated_user_log_id=None):
+                                           updated_user_log_id=None, save_user=True):
         user_updated = False
         user_processed = False
         user_newly_deleted = False
@@ -543,14 +1611,6 @@ class UserPoint(models.Model):
         if not deleted_user and self.deleted_date is not None:
             self.deleted_date = None
         logger.debug(f"{log_prefix}  deleted_user = {deleted_user}")
-        file_name_friendly_member_name = member.name.replace("/", "").replace("\\", "")
-        avatar_file_name = (
-            f'levelling-avatar-{file_name_friendly_member_name}-{time.time()}.png'.replace(" ", "-")
-        )
-
-        avatar_file_name = avatar_file_name.replace(">", "").replace("_", "-")
-        # removing > as just that alone can break url rendering in discord [for obvious reasons]
-        # also removing _ as _ followed by any special character can also break url rendering in discord
         try:
             if user_newly_deleted or (deleted_user and not user_newly_deleted):
                 leveling_message_avatar_cdn_url = await self.get_cdn_url(logger, levelling_website_avatar_channel, guild_id, member)
@@ -575,7 +1635,7 @@ class UserPoint(models.Model):
                     avatar_url_changed, changes_detected, display_avatar_url, leveling_message_avatar_url,
                     avatar_message, oversized_pic
                 ) = await self.get_latest_avatar_cdn(
-                    logger, member, levelling_website_avatar_channel, guild_id, avatar_file_name
+                    logger, member, levelling_website_avatar_channel, guild_id
                 )
             number_of_changes = 1 if avatar_url_changed else 0
             logger.debug(
@@ -612,35 +1672,125 @@ class UserPoint(models.Model):
                 self.name = member.name
                 user_updated = True
             self.outsized_profile_pic = oversized_pic
+            avatar_link_expiry_scheduler = AvatarLinkExpiryScheduler.active()
+            if oversized_pic and avatar_link_expiry_scheduler is not None:
+                avatar_link_expiry_scheduler.unschedule(self.user_id)
             if updated_user_log_id is not None:
                 logger.debug(
                     f"{log_prefix} attempting deletion of UpdatedUser record for id {updated_user_log_id}"
                 )
                 await UpdatedUser.async_delete(updated_user_log_id)
             self.leveling_update_attempt = 0
-            await self.async_save()
+            if save_user:
+                await self.async_save()
             user_processed = True
         except Exception as e:
             logger.error(
                 "[wall_e_models models.py update_leveling_profile_info()] experienced following error when "
                 f"trying to update the profile info for {member}\n{e}"
             )
-            await asyncio.sleep(5)
-            await self.async_save()
-            if os.path.exists(avatar_file_name):
-                os.remove(avatar_file_name)
+            if save_user:
+                await asyncio.sleep(5)
+                await self.async_save()
+            else:
+                # the instance may be older than XP that has been saved since, so only the profile columns are saved
+                await sync_to_async(self.save)(update_fields=UserPoint.PROFILE_FIELDS)
             raise Exception(e)
         return user_updated, user_processed
 
-    async def get_latest_avatar_cdn(self, logger, member, levelling_website_avatar_channel,
-                                    guild_id, avatar_file_name):
+    @staticmethod
+    async def update_leveling_profiles(logger, guild_id, user_ids, get_member, levelling_website_avatar_channel,
+                                       max_concurrent_updates=5, save_batch_size=50, report_progress=None):
+        """
+        Runs update_leveling_profile_info for the given users with a bounded number of concurrent workers and saves
+        the updated users in batches
+
+        Keyword Arguments
+        logger -- the logger to use
+        guild_id -- the ID of the guild
+        user_ids -- the user_ids of the users to update, such as those from get_users_with_current_bucket_number
+        get_member -- coroutine function that returns the member object for a user_id or None if there isn't one
+        levelling_website_avatar_channel -- the channel object that hosts the avatars
+        max_concurrent_updates -- the number of users to update at the same time
+        save_batch_size -- the number of updated users to save with each bulk_update
+        report_progress -- optional function that is called with the number of users done and the total number of
+         users after each user is done
+
+        Return
+        dict -- the (user_updated, user_processed) returned by update_leveling_profile_info for each user_id whose
+         changes were saved
+        dict -- the exception that was encountered for each user_id that could not be updated or saved
+        """
+        results = {}
+        errors = {}
+        user_points = await sync_to_async(
+            lambda: {user_point.user_id: user_point for user_point in UserPoint.objects.filter(user_id__in=user_ids)}
+        )()
+        users_to_update = asyncio.Queue()
+        for user_id in user_ids:
+            users_to_update.put_nowait(user_id)
+        # the user_ids and results of the users that have been updated but not saved yet
+        users_to_save = []
+        number_of_users_done = 0
+
+        async def save_users(minimum_batch_size):
+            nonlocal users_to_save
+            if len(users_to_save) < max(1, minimum_batch_size):
+                return
+            batch, users_to_save = users_to_save, []
+            try:
+                await sync_to_async(UserPoint.objects.bulk_update)(
+                    [user_points[user_id] for user_id, _ in batch], UserPoint.PROFILE_FIELDS
+                )
+            except Exception as e:
+                logger.error(
+                    f"[wall_e_models models.py update_leveling_profiles()] unable to save a batch of {len(batch)} "
+                    f"users\n{e}"
+                )
+                for user_id, _ in batch:
+                    errors[user_id] = e
+                return
+            results.update(batch)
+            logger.debug(
+                f"[wall_e_models models.py update_leveling_profiles()] saved a batch of {len(batch)} users"
+            )
+
+        async def update_users():
+            nonlocal number_of_users_done
+            while not users_to_update.empty():
+                user_id = users_to_update.get_nowait()
+                try:
+                    if user_id not in user_points:
+                        raise Exception(f"no UserPoint exists for user with id {user_id}")
+                    member = await get_member(user_id)
+                    if member is None:
+                        raise Exception(f"unable to find the member with id {user_id}")
+                    result = await user_points[user_id].update_leveling_profile_info(
+                        logger, guild_id, member, levelling_website_avatar_channel, save_user=False
+                    )
+                    users_to_save.append((user_id, result))
+                except Exception as e:
+                    errors[user_id] = e
+                await save_users(save_batch_size)
+                number_of_users_done += 1
+                logger.debug(
+                    f"[wall_e_models models.py update_leveling_profiles()] {number_of_users_done}/{len(user_ids)} "
+                    f"users done"
+                )
+                if report_progress is not None:
+                    report_progress(number_of_users_done, len(user_ids))
+
+        await asyncio.gather(*[update_users() for _ in range(max(1, max_concurrent_updates))])
+        await save_users(1)
+        return results, errors
+
+    async def get_latest_avatar_cdn(self, logger, member, levelling_website_avatar_channel, guild_id):
         """
         :param logger:
         :param member: the member object
         :param levelling_website_avatar_channel: the discord.Message object pointing to the channel that hosts the
          avatars
         :param guild_id: the ID of the guild
-        :param avatar_file_name: the name to use for the avatar file
         :return:
         bool - True if something was changed
         string - what was changed or empty string if nothing was changed
@@ -654,7 +1804,7 @@ class UserPoint(models.Model):
             logger.debug(
                 f"[wall_e_models models.py get_latest_avatar_cdn()] creating fresh avatar message for user [{member}]"
             )
-            avatar_message, oversized_pic = await self.create_avatar_message(logger, avatar_file_name, member, levelling_website_avatar_channel)
+            avatar_message, oversized_pic = await self.create_avatar_message(logger, member, levelling_website_avatar_channel)
             if avatar_message:
                 leveling_message_avatar_cdn_url = avatar_message.attachments[0].url
                 logger.debug(
@@ -669,7 +1819,7 @@ class UserPoint(models.Model):
             logger.debug(
                 f"[wall_e_models models.py get_latest_avatar_cdn()] user [{member}] has changed their avatar"
             )
-            avatar_message, oversized_pic = await self.create_avatar_message(logger, avatar_file_name, member, levelling_website_avatar_channel)
+            avatar_message, oversized_pic = await self.create_avatar_message(logger, member, levelling_website_avatar_channel)
             if avatar_message:
                 await self.delete_avatar_message(levelling_website_avatar_channel)
                 logger.debug(
@@ -710,6 +1860,13 @@ class UserPoint(models.Model):
         return False, "", None, None, None, oversized_pic
 
     async def get_cdn_url(self, logger, levelling_website_avatar_channel, guild_id, member):
+        cdn_link_validation_cache = CdnLinkValidationCache.shared()
+        if cdn_link_validation_cache.is_valid(self.leveling_message_avatar_url, self.discord_avatar_link_expiry_date):
+            logger.debug(
+                f"[wall_e_models models.py get_cdn_url()] CDN link <{self.leveling_message_avatar_url}> for member "
+                f"with id {member.id} has not expired yet"
+            )
+            return self.leveling_message_avatar_url
         number_of_attempts = 0
         total_number_of_attempts = 5
         successful_avatar_link_retrieval = False
@@ -729,13 +1886,13 @@ class UserPoint(models.Model):
                 leveling_message_avatar_cdn_url = (await levelling_website_avatar_channel.fetch_message(
                     self.avatar_url_message_id
                 )).attachments[0].url
-                resp = requests.get(leveling_message_avatar_cdn_url)
+                status_code = await AvatarHttpClient.shared().get_status(leveling_message_avatar_cdn_url)
                 logger.debug(
                     f"[wall_e_models models.py get_cdn_url()] "
-                    f"got a status_code of {resp.status_code} for leveling_message_avatar_cdn_url = "
+                    f"got a status_code of {status_code} for leveling_message_avatar_cdn_url = "
                     f"<{leveling_message_avatar_cdn_url}>"
                 )
-                if resp.status_code != 200:
+                if status_code != 200:
                     error_message = (
                         f"CDN link of <{leveling_message_avatar_cdn_url}> obtained from message "
                         f"<{message_link}> is not valid and appears to be expired"
@@ -744,6 +1901,7 @@ class UserPoint(models.Model):
                         f"[wall_e_models models.py get_cdn_url()] {error_message}"
                     )
                     raise Exception(error_message)
+                cdn_link_validation_cache.mark_as_valid(logger, leveling_message_avatar_cdn_url)
                 successful_avatar_link_retrieval = True
             except discord.NotFound:
                 logger.error(
@@ -768,15 +1926,21 @@ class UserPoint(models.Model):
 
         return leveling_message_avatar_cdn_url
 
-    async def create_avatar_message(self, logger, avatar_file_name, member, levelling_website_avatar_channel):
-        with open(avatar_file_name, "wb") as file:
-            file.write(requests.get(member.display_avatar.url).content)
-        message = f"{member.name}\n<@{member.id}>"
+    async def create_avatar_message(self, logger, member, levelling_website_avatar_channel):
+        avatar = await AvatarHttpClient.shared().get_content(member.display_avatar.url)
         avatar_msg = None
+        if len(avatar) > UserPoint.MAX_AVATAR_SIZE:
+            logger.warn(
+                f"[wall_e_models models.py create_avatar_message()] not uploading user {member} with id {member.id}'s"
+                f" profile image to discord as its size of {len(avatar)} bytes is over the limit of "
+                f"{UserPoint.MAX_AVATAR_SIZE} bytes"
+            )
+            return avatar_msg, True
+        message = f"{member.name}\n<@{member.id}>"
         oversized_pic = False
         try:
             avatar_msg = await levelling_website_avatar_channel.send(
-                content=message, file=discord.File(avatar_file_name)
+                content=message, file=discord.File(io.BytesIO(avatar), filename=f"levelling-avatar-{member.id}.png")
             )
         except HTTPException as e:
             logger.warn(
@@ -784,7 +1948,6 @@ class UserPoint(models.Model):
                 f" with id {member.id}'s profile image to discord:\n{e}"
             )
             oversized_pic = True
-        os.remove(avatar_file_name)
         return avatar_msg, oversized_pic
 
     async def delete_avatar_message(self, levelling_website_avatar_channel):
@@ -804,6 +1967,264 @@ class UserPoint(models.Model):
             user_point.last_updated_date = pstdatetime.now().pst
             user_point.save()
 
+class DeadlineHeap:
+    """
+    Min-heap of (deadline epoch, key) that can be awaited from the event loop, which wakes up exactly when the
+    earliest deadline passes or the deadlines change instead of polling the database.
+
+    Deadlines can be scheduled and unscheduled from any thread. Each key only has one deadline at a time and the
+    entries that were replaced in the heap are skipped once they reach the top.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._deadlines = {}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._deadlines_changed = asyncio.Event()
+
+    def schedule(self, key, deadline_epoch):
+        with self._lock:
+            if self._deadlines.get(key) == deadline_epoch:
+                return
+            self._deadlines[key] = deadline_epoch
+            heapq.heappush(self._heap, (deadline_epoch, key))
+        self._notify_deadlines_changed()
+
+    def unschedule(self, key):
+        with self._lock:
+            if self._deadlines.pop(key, None) is None:
+                return
+        self._notify_deadlines_changed()
+
+    def _notify_deadlines_changed(self):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._deadlines_changed.set)
+
+    def _pop_due(self):
+        """
+        Return
+        the key whose deadline has passed or None if there isn't one yet
+        float -- the number of seconds until the next deadline or None if nothing is scheduled
+        """
+        with self._lock:
+            while len(self._heap) > 0:
+                deadline_epoch, key = self._heap[0]
+                if self._deadlines.get(key) != deadline_epoch:
+                    heapq.heappop(self._heap)
+                    continue
+                seconds_until_deadline = deadline_epoch - time.time()
+                if seconds_until_deadline > 0:
+                    return None, seconds_until_deadline
+                heapq.heappop(self._heap)
+                del self._deadlines[key]
+                return key, 0
+        return None, None
+
+    async def next_due(self):
+        """Waits until the next deadline passes and returns its key"""
+        self._loop = asyncio.get_running_loop()
+        while True:
+            self._deadlines_changed.clear()
+            key, seconds_until_deadline = self._pop_due()
+            if key is not None:
+                return key
+            try:
+                await asyncio.wait_for(self._deadlines_changed.wait(), seconds_until_deadline)
+            except asyncio.TimeoutError:
+                pass
+
+
+class CdnLinkValidationCache:
+    """
+    Bounded LRU of the avatar CDN links that are known to be valid along with the epoch time that discord has them
+    expiring at, which is parsed from their "ex" query parameter.
+
+    A link is trusted until its expiry minus safety_margin seconds, using the discord_avatar_link_expiry_date
+    recorded for the user if the link has not been validated by this process yet. This lets UserPoint.get_cdn_url
+    skip fetching the avatar message and checking the link with the CDN for most of the users in a bucket.
+    """
+    _shared = None
+
+    def __init__(self, max_size=10000, safety_margin=3600):
+        self.max_size = max_size
+        self.safety_margin = safety_margin
+        self._link_expiry_epochs = collections.OrderedDict()
+
+    @classmethod
+    def shared(cls) -> CdnLinkValidationCache:
+        if cls._shared is None:
+            cls._shared = CdnLinkValidationCache()
+        return cls._shared
+
+    @classmethod
+    def set_shared(cls, cdn_link_validation_cache: CdnLinkValidationCache):
+        cls._shared = cdn_link_validation_cache
+
+    def is_valid(self, url, link_expiry_date=None) -> bool:
+        """
+        Determines if the given CDN link can be trusted without checking it with discord
+
+        Keyword Arguments
+        url -- the CDN link
+        link_expiry_date -- the expiry date already recorded for the link, used if the link is not in the cache yet
+
+        Return
+        bool -- True if the link has been validated or has a recorded expiry and is not about to expire
+        """
+        if not isinstance(url, str):
+            return False
+        link_expiry_epoch = self._link_expiry_epochs.get(url)
+        if link_expiry_epoch is None:
+            if link_expiry_date is None:
+                return False
+            link_expiry_epoch = self._link_expiry_epochs[url] = link_expiry_date.timestamp()
+            self._evict_oldest_links()
+        if time.time() >= link_expiry_epoch - self.safety_margin:
+            del self._link_expiry_epochs[url]
+            return False
+        self._link_expiry_epochs.move_to_end(url)
+        return True
+
+    def mark_as_valid(self, logger, url):
+        """Trusts the given CDN link until it is about to expire"""
+        try:
+            link_expiry_epoch = UserPoint.parse_avatar_link_expiry_epoch(url)
+        except ValueError as e:
+            logger.debug(
+                f"[wall_e_models models.py mark_as_valid()] unable to determine the expiry of <{url}>, so it will "
+                f"not be cached\n{e}"
+            )
+            return
+        self._link_expiry_epochs[url] = link_expiry_epoch
+        self._link_expiry_epochs.move_to_end(url)
+        self._evict_oldest_links()
+
+    def _evict_oldest_links(self):
+        while len(self._link_expiry_epochs) > self.max_size:
+            self._link_expiry_epochs.popitem(last=False)
+
+    def invalidate(self, url):
+        self._link_expiry_epochs.pop(url, None)
+
+
+class AvatarLinkExpiryScheduler:
+    """
+    In-process schedule of when each user's avatar CDN link expires, kept in a DeadlineHeap so that the expired
+    avatar refresh can wait until exactly the next expiry instead of polling get_users_with_expired_images.
+
+    Enable it with AvatarLinkExpiryScheduler.enable() from within the bot's event loop, which loads the expiry dates
+    from the database. UserPoint.set_avatar_link_expiry_date keeps it up to date after that and the users are handed
+    out by due_users() as their link expires.
+
+    A user that is handed out is scheduled again retry_delay seconds later, doubling with each retry up to
+    max_retry_delay, so that a refresh that fails is tried again. A successful refresh replaces that retry with the
+    new expiry date through set_avatar_link_expiry_date.
+    """
+    _active = None
+
+    def __init__(self, retry_delay=60, max_retry_delay=3600):
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._expiry_dates = DeadlineHeap()
+        self._number_of_retries = {}
+
+    @classmethod
+    def active(cls) -> AvatarLinkExpiryScheduler | None:
+        return cls._active
+
+    @classmethod
+    async def enable(cls, retry_delay=60, max_retry_delay=3600) -> AvatarLinkExpiryScheduler:
+        """Creates the scheduler with the expiry dates of all the users whose avatar link can expire"""
+        if cls._active is None:
+            avatar_link_expiry_scheduler = AvatarLinkExpiryScheduler(
+                retry_delay=retry_delay, max_retry_delay=max_retry_delay
+            )
+            user_expiry_dates = await sync_to_async(lambda: list(
+                UserPoint.objects.filter(
+                    outsized_profile_pic=False, discord_avatar_link_expiry_date__isnull=False
+                ).values_list('user_id', 'discord_avatar_link_expiry_date')
+            ))()
+            for user_id, discord_avatar_link_expiry_date in user_expiry_dates:
+                avatar_link_expiry_scheduler.schedule(user_id, discord_avatar_link_expiry_date)
+            cls._active = avatar_link_expiry_scheduler
+        return cls._active
+
+    @classmethod
+    def disable(cls):
+        cls._active = None
+
+    def schedule(self, user_id, discord_avatar_link_expiry_date):
+        """Sets or changes when the given user's avatar link expires"""
+        self._number_of_retries.pop(user_id, None)
+        self._expiry_dates.schedule(user_id, discord_avatar_link_expiry_date.timestamp())
+
+    def unschedule(self, user_id):
+        self._number_of_retries.pop(user_id, None)
+        self._expiry_dates.unschedule(user_id)
+
+    async def next_due_user(self) -> int:
+        """
+        Waits until the next avatar link expires, or a retry is due, and returns the user_id it belongs to. The
+        user's next retry is scheduled before the user_id is returned.
+        """
+        user_id = await self._expiry_dates.next_due()
+        number_of_retries = self._number_of_retries.get(user_id, 0)
+        self._number_of_retries[user_id] = number_of_retries + 1
+        retry_delay = min(self.max_retry_delay, self.retry_delay * 2 ** min(number_of_retries, 32))
+        self._expiry_dates.schedule(user_id, time.time() + retry_delay)
+        return user_id
+
+    async def due_users(self):
+        """Yields the user_ids of the users as their avatar link expires"""
+        while True:
+            yield await self.next_due_user()
+
+
+class UserPointWriteBehind(PeriodicFlushBuffer):
+    """
+    Opt-in write-behind buffer for the XP changes that UserPoint.increment_points makes.
+
+    While enabled, increment_points only records the UserPoint as dirty instead of saving the whole row and the
+    dirty users are written to the database with a single bulk_update of just the XP columns every flush_interval
+    seconds or as soon as max_dirty_users is reached, whichever comes first. Users stay dirty until a flush saves them.
+    """
+    XP_FIELDS = [
+        'points', 'level_up_specific_points', 'message_count', 'level_number', 'latest_time_xp_was_earned_epoch'
+    ]
+
+    _active = None
+
+    def __init__(self, logger, flush_interval=5, max_dirty_users=500):
+        super(UserPointWriteBehind, self).__init__(logger, flush_interval)
+        self.max_dirty_users = max_dirty_users
+        self._dirty_users = {}
+
+    def add(self, user_point: UserPoint):
+        with self._lock:
+            self._dirty_users[user_point.user_id] = user_point
+            flush_needed = len(self._dirty_users) >= self.max_dirty_users
+        if flush_needed:
+            self._flush_and_log_errors()
+
+    def flush(self) -> int:
+        """Saves the XP columns of all the dirty users and returns how many were saved"""
+        with self._lock:
+            dirty_users = self._dirty_users
+            self._dirty_users = {}
+        if len(dirty_users) == 0:
+            return 0
+        try:
+            UserPoint.objects.bulk_update(list(dirty_users.values()), self.XP_FIELDS)
+        except Exception:
+            with self._lock:
+                # putting back the users that could not be saved unless they have been marked dirty again since
+                for user_id, user_point in dirty_users.items():
+                    self._dirty_users.setdefault(user_id, user_point)
+            raise
+        return len(dirty_users)
+
+
 class UpdatedUser(models.Model):
     user_point = models.ForeignKey(
         UserPoint, on_delete=models.CASCADE
@@ -867,11 +2288,13 @@ class Level(models.Model):
             role_id=role_id, role_name=role_name
         )
         level.save()
+        LevelIndex.invalidate()
         return level
 
     @sync_to_async
     def async_save(self):
         self.save()
+        LevelIndex.invalidate()
 
     @staticmethod
     @sync_to_async
@@ -888,6 +2311,7 @@ class Level(models.Model):
         self.role_name = new_role_name
         self.role_id = role_id
         self.save()
+        LevelIndex.invalidate()
 
     @sync_to_async
     def rename_level_name(self, new_role_name):
@@ -904,6 +2328,80 @@ class Level(models.Model):
         return f"[Level {self.number} - {self.role_name}]"
 
 
+class LevelIndex:
+    """
+    Immutable, process-wide view of the Level table used for the XP math in UserPoint so that the hot path of
+    counting a message does not need to query the Level table.
+
+    The levels are laid out in order of total_points_required and the cumulative XP needed to reach the end of
+    each level is kept in a sorted tuple so that the level a given amount of points falls into can be found with
+    a bisect.
+
+    LevelIndex.get() builds the index from the database the first time it is needed,
+    LevelIndex.warm() builds it from Level.load_to_cache() and
+    LevelIndex.invalidate() has to be called whenever a Level is changed.
+    """
+    __slots__ = ('_level_numbers', '_level_starts', '_level_ends', '_xp_needed')
+
+    _current = None
+
+    def __init__(self, levels):
+        levels = sorted(levels, key=lambda level: level.total_points_required)
+        level_numbers = []
+        level_starts = []
+        level_ends = []
+        xp_needed = {}
+        cumulative_points = 0
+        for level in levels:
+            level_numbers.append(level.number)
+            level_starts.append(cumulative_points)
+            cumulative_points += level.xp_needed_to_level_up_to_next_level
+            level_ends.append(cumulative_points)
+            xp_needed[level.number] = level.xp_needed_to_level_up_to_next_level
+        self._level_numbers = tuple(level_numbers)
+        self._level_starts = tuple(level_starts)
+        self._level_ends = tuple(level_ends)
+        self._xp_needed = xp_needed
+
+    @classmethod
+    def get(cls) -> LevelIndex:
+        """Returns the current index, building it from the Level table if it has been invalidated"""
+        level_index = cls._current
+        if level_index is None:
+            level_index = cls._current = LevelIndex(Level.objects.all())
+        return level_index
+
+    @classmethod
+    async def warm(cls) -> LevelIndex:
+        """Builds the index from Level.load_to_cache(), meant to be called when the bot starts up"""
+        cls._current = LevelIndex((await Level.load_to_cache()).values())
+        return cls._current
+
+    @classmethod
+    def invalidate(cls):
+        cls._current = None
+
+    def locate(self, points):
+        """
+        Determines where in the levels the given amount of points falls
+
+        Keyword Arguments
+        points -- the total points of a user
+
+        Return
+        int -- the number of the level that the points fall into
+        int -- the points earned since reaching that level
+        int -- the points needed to level up to the next level
+        """
+        index = min(bisect.bisect_left(self._level_ends, points), len(self._level_ends) - 1)
+        level_number = self._level_numbers[index]
+        return level_number, points - self._level_starts[index], self._xp_needed[level_number]
+
+    def xp_needed(self, level_number):
+        """Returns the xp_needed_to_level_up_to_next_level for the level with the given number"""
+        return self._xp_needed[level_number]
+
+
 class Reminder(models.Model):
     id = models.BigAutoField(
         primary_key=True
@@ -919,6 +2417,12 @@ class Reminder(models.Model):
         default=0
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['reminder_date_epoch'], name='reminder_date_idx'),
+            models.Index(fields=['author_id', 'reminder_date_epoch'], name='reminder_author_date_idx'),
+        ]
+
     def __str__(self):
         return f"Reminder for user {self.author_id} on date {self.reminder_date_epoch} with message {self.message}"
 
@@ -944,15 +2448,37 @@ class Reminder(models.Model):
         else:
             return reminders[0]
 
+    @classmethod
+    @sync_to_async
+    def claim_expired_reminders(cls) -> List[Reminder]:
+        """Deletes and returns all the reminders that are due in one transaction so they are only sent once"""
+        with transaction.atomic():
+            expired_reminders = list(
+                Reminder.objects.select_for_update().filter(reminder_date_epoch__lte=time.time())
+            )
+            Reminder.objects.filter(id__in=[reminder.id for reminder in expired_reminders]).delete()
+        reminder_dispatcher = ReminderDispatcher.active()
+        if reminder_dispatcher is not None:
+            for reminder in expired_reminders:
+                reminder_dispatcher.unschedule(reminder.id)
+        return expired_reminders
+
     @classmethod
     @sync_to_async
     def delete_reminder_by_id(cls, reminder_to_delete):
         Reminder.objects.all().get(id=reminder_to_delete).delete()
+        reminder_dispatcher = ReminderDispatcher.active()
+        if reminder_dispatcher is not None:
+            reminder_dispatcher.unschedule(int(reminder_to_delete))
 
     @classmethod
     @sync_to_async
     def delete_reminder(cls, reminder_to_delete):
+        reminder_id = reminder_to_delete.id
         reminder_to_delete.delete()
+        reminder_dispatcher = ReminderDispatcher.active()
+        if reminder_dispatcher is not None:
+            reminder_dispatcher.unschedule(reminder_id)
 
     @classmethod
     @sync_to_async
@@ -968,6 +2494,9 @@ class Reminder(models.Model):
     @sync_to_async
     def save_reminder(cls, reminder_to_save):
         reminder_to_save.save()
+        reminder_dispatcher = ReminderDispatcher.active()
+        if reminder_dispatcher is not None:
+            reminder_dispatcher.schedule(reminder_to_save)
 
     def get_countdown(self, current_time):
         seconds = round(self.reminder_date_epoch - current_time.timestamp())
@@ -990,12 +2519,67 @@ class Reminder(models.Model):
         return f"{message} from now"
 
 
+class ReminderDispatcher:
+    """
+    Keeps the upcoming reminders in a DeadlineHeap keyed by their reminder_date_epoch so that the reminders can be
+    sent as soon as they are due without polling get_expired_reminders.
+
+    Enable it with ReminderDispatcher.enable() from within the bot's event loop, which loads the reminders from the
+    database. Reminder.save_reminder, Reminder.delete_reminder and Reminder.delete_reminder_by_id keep it up to date
+    after that and the due reminders are claimed from the database and handed out by due_reminders().
+    """
+    _active = None
+
+    def __init__(self):
+        self._reminder_dates = DeadlineHeap()
+
+    @classmethod
+    def active(cls) -> ReminderDispatcher | None:
+        return cls._active
+
+    @classmethod
+    async def enable(cls) -> ReminderDispatcher:
+        if cls._active is None:
+            reminder_dispatcher = ReminderDispatcher()
+            reminder_dates = await sync_to_async(
+                lambda: list(Reminder.objects.values_list('id', 'reminder_date_epoch'))
+            )()
+            for reminder_id, reminder_date_epoch in reminder_dates:
+                reminder_dispatcher._reminder_dates.schedule(reminder_id, reminder_date_epoch)
+            cls._active = reminder_dispatcher
+        return cls._active
+
+    @classmethod
+    def disable(cls):
+        cls._active = None
+
+    def schedule(self, reminder: Reminder):
+        self._reminder_dates.schedule(reminder.id, reminder.reminder_date_epoch)
+
+    def unschedule(self, reminder_id):
+        self._reminder_dates.unschedule(reminder_id)
+
+    async def next_due_reminders(self) -> List[Reminder]:
+        """Waits until the next reminder is due and returns all the reminders that were claimed at that point"""
+        while True:
+            await self._reminder_dates.next_due()
+            expired_reminders = await Reminder.claim_expired_reminders()
+            if len(expired_reminders) > 0:
+                return expired_reminders
+
+    async def due_reminders(self):
+        """Yields the reminders as they become due"""
+        while True:
+            for reminder in await self.next_due_reminders():
+                yield reminder
+
+
 class HelpMessage(models.Model):
     id = models.BigAutoField(primary_key=True)
     message_id = models.BigIntegerField(null=False)
     channel_name = models.CharField(max_length=500, default=None, null=True)
     channel_id = models.BigIntegerField(null=False)
-    help_message_expiration_date = models.BigIntegerField(default=0)
+    help_message_expiration_date = models.BigIntegerField(default=0, db_index=True)
     time_created = models.BigIntegerField(default=0)
 
     @property
@@ -1012,11 +2596,41 @@ class HelpMessage(models.Model):
         """Adds entry to HelpMessage table"""
         record.save()
 
+    @classmethod
+    @sync_to_async
+    def insert_records(cls, records: List[HelpMessage]) -> None:
+        """Adds entries to HelpMessage table"""
+        for record in records:
+            record.set_expiration_date()
+        HelpMessage.objects.bulk_create(records)
+
     @classmethod
     @sync_to_async
     def delete_message(cls, help_message_record_to_delete):
         help_message_record_to_delete.delete()
 
+    @classmethod
+    @sync_to_async
+    def pop_expired(cls, limit=None) -> List[tuple]:
+        """
+        Deletes the help messages that have expired in one transaction
+
+        Keyword Arguments
+        limit -- the maximum number of help messages to delete, the ones that expired first are deleted first
+
+        Return
+        list -- the (channel_id, message_id) of each help message that was deleted
+        """
+        with transaction.atomic():
+            expired_help_messages = HelpMessage.objects.select_for_update().filter(
+                help_message_expiration_date__lte=convert_utc_time_to_pacific(datetime.datetime.now()).timestamp()
+            ).order_by('help_message_expiration_date').values_list('id', 'channel_id', 'message_id')
+            if limit is not None:
+                expired_help_messages = expired_help_messages[:limit]
+            expired_help_messages = list(expired_help_messages)
+            HelpMessage.objects.filter(id__in=[help_message[0] for help_message in expired_help_messages]).delete()
+        return [(channel_id, message_id) for _, channel_id, message_id in expired_help_messages]
+
     @classmethod
     @sync_to_async
     def get_messages_to_delete(cls):
@@ -1026,10 +2640,13 @@ class HelpMessage(models.Model):
             )
         )
 
-    def save(self, *args, **kwargs):
+    def set_expiration_date(self):
         self.help_message_expiration_date = (
                 convert_utc_time_to_pacific(datetime.datetime.now()) + datetime.timedelta(minutes=1)
         ).timestamp()
+
+    def save(self, *args, **kwargs):
+        self.set_expiration_date()
         super(HelpMessage, self).save(*args, **kwargs)
 
     def __str__(self):
@@ -1060,18 +2677,55 @@ class EmbedAvatar(models.Model):
     avatar_discord_permanent_url = models.CharField(
         max_length=5000
     )
+    # sha256 of avatar_discord_url as the URL itself is too long to index
+    avatar_discord_url_digest = models.CharField(
+        max_length=64,
+        default=None,
+        null=True,
+        db_index=True
+    )
+
+    # bounded LRU of avatar_discord_url => (id, avatar_discord_permanent_url) for the avatars that were looked up
+    # or inserted most recently
+    MAX_CACHED_AVATARS = 2000
+    _cached_avatars = collections.OrderedDict()
+    _cached_avatars_lock = threading.Lock()
+
+    @staticmethod
+    def get_url_digest(url) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def _cache_avatar(cls, avatar: EmbedAvatar):
+        with cls._cached_avatars_lock:
+            cls._cached_avatars[avatar.avatar_discord_url] = (avatar.id, avatar.avatar_discord_permanent_url)
+            cls._cached_avatars.move_to_end(avatar.avatar_discord_url)
+            while len(cls._cached_avatars) > cls.MAX_CACHED_AVATARS:
+                cls._cached_avatars.popitem(last=False)
 
     @classmethod
     @sync_to_async
     def insert_record(cls, record: EmbedAvatar) -> None:
         """Adds entry to EmbedAvatar table"""
         record.save()
+        EmbedAvatar._cache_avatar(record)
 
     @classmethod
     @sync_to_async
     def get_avatar_by_url(cls, url):
-        avatars = EmbedAvatar.objects.all().filter(avatar_discord_url=url)
-        if len(avatars) == 0:
-            return None
-        else:
-            return avatars[0]
+        with EmbedAvatar._cached_avatars_lock:
+            cached_avatar = EmbedAvatar._cached_avatars.get(url)
+            if cached_avatar is not None:
+                EmbedAvatar._cached_avatars.move_to_end(url)
+        if cached_avatar is not None:
+            return EmbedAvatar(id=cached_avatar[0], avatar_discord_url=url, avatar_discord_permanent_url=cached_avatar[1])
+        avatar = EmbedAvatar.objects.filter(
+            avatar_discord_url_digest=EmbedAvatar.get_url_digest(url), avatar_discord_url=url
+        ).first()
+        if avatar is not None:
+            EmbedAvatar._cache_avatar(avatar)
+        return avatar
+
+    def save(self, *args, **kwargs):
+        self.avatar_discord_url_digest = EmbedAvatar.get_url_digest(self.avatar_discord_url)
+        super(EmbedAvatar, self).save(*args, **kwargs)